@@ -0,0 +1,209 @@
+"""无界面性能基准
+
+在 Linux 上用离屏 SDL 窗口 + mock GL 后端启动 GuessGameApp，逐项计时热点路径：
+答对/跳过的吞吐、出题延迟、1 万 / 10 万词条的 set_category、随机大挑战、设置弹窗、界面切换。
+结果和 bench_baseline.json 比较，任何一项比基准慢 tolerance 以上就以非零状态退出，
+打 APK 之前就能发现性能回退。用户数据目录指向临时目录，不会动到本机的出题记录。
+
+基准和 CI 往往不是同一台机器：每次运行先跑一段固定的纯 Python 负载 (calibrate)，
+基准里记下它的耗时 (_calibration)，比较时按两次的比值缩放基准，只看相对这台机器快慢的变化。
+
+用法:
+    python bench.py                 对比基准
+    python bench.py --update        重新记录基准 (改了性能相关代码之后；换机器不用重录，按校准负载换算)
+    python bench.py --tolerance 0.5 允许慢五成以内 (默认一倍)
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import traceback
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+TOLERANCE = 1.0  # 共享的 CI 机器上整体快慢能差五成以上，慢一倍才算回退
+NOISE = 50e-6  # 比基准慢不到这么多 (秒) 不算回退，微秒级的项目相对误差太大
+REPEAT = 7
+
+# 必须在导入 Kivy 之前设置
+os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+os.environ.setdefault('KIVY_GL_BACKEND', 'mock')
+os.environ['KIVY_NO_ARGS'] = '1'
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+os.environ['KCFG_GRAPHICS_MAXFPS'] = '0'  # 手动推进事件循环时不按帧率等待
+os.environ['XDG_CONFIG_HOME'] = tempfile.mkdtemp(prefix='guess-bench-')  # App.user_data_dir
+
+
+def measure(fn, number, setup=None, repeat=REPEAT):
+    """每轮调用 fn() number 次，返回各轮平均单次耗时的最小值 (秒，受其他进程干扰最少)；第一轮预热，不计入"""
+    samples = []
+    for _ in range(repeat + 1):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return min(samples[1:])
+
+
+def calibrate():
+    """与被测代码无关的固定负载：字符串格式化、字典读写、排序，用来估计这台机器的快慢"""
+    d = {f'词条{i}': i * 7919 % 10007 for i in range(20000)}
+    return sorted(d, key=d.get)
+
+
+def run_benchmarks(app, game_main):
+    from kivy.base import EventLoop
+    from kivy.core.window import Window
+    from kivy.uix.screenmanager import NoTransition
+
+    sm = app.root
+    game = sm.get_screen('game')
+    bank = sm.get_screen('question_bank')
+    results = {}
+
+    words_10k = [f'词条{i}' for i in range(10000)]
+    words_100k = [f'词条{i}' for i in range(100000)]
+
+    def start_round(words, mode='time'):
+        app.game_mode = mode
+        game.set_category('bench', words)
+        game.clock.phase = 'play'
+        game.play_start = game.clock.now()
+        game.show_question()
+
+    # 答题：time 模式下不会提前结束
+    start_round(words_10k)
+    results['handle_correct'] = measure(lambda: game.handle_correct(None), 200)
+    results['handle_wrong'] = measure(lambda: game.handle_wrong(None), 200)
+    results['show_question'] = measure(game.show_question, 200)
+    game.clear_ring()
+
+    # 每轮清掉内存里的牌堆，算上从磁盘读出题记录
+    for name, words in (('set_category_10k', words_10k), ('set_category_100k', words_100k)):
+        results[name] = measure(lambda: (game.set_category('bench', words), game.clear_ring()), 1,
+                                setup=game.decks.decks.clear)
+    app.sample_mode = 'balanced'
+    results['set_category_100k_balanced'] = measure(
+        lambda: (game.set_category('bench', words_100k), game.clear_ring()), 1,
+        setup=game.weighted.clear)  # 每轮都从头建权重
+    app.sample_mode = 'random'
+
+    # 随机大挑战不切换界面，只算准备题目
+    select = bank.select_category
+    bank.select_category = lambda name, questions: game.set_category(name, questions)
+    results['start_random_challenge'] = measure(lambda: (bank.start_random_challenge(None), game.clear_ring()), 20)
+    bank.select_category = select
+
+    popup = game_main.SettingsPopup.get()
+    results['settings_popup_open'] = measure(lambda: (popup.open(), popup.dismiss()), 50)
+    results['settings_switch_mode'] = measure(lambda: (popup.switch_mode('score'), popup.switch_mode('time')), 200)
+
+    # 界面切换：不计动画时长，只计切换本身 (on_leave / on_enter 等) 的主线程开销
+    transition = sm.transition
+    sm.transition = NoTransition()
+    sm.current = 'main_menu'
+    results['screen_switch'] = measure(
+        lambda: (setattr(sm, 'current', 'my_page'), setattr(sm, 'current', 'main_menu')), 50)
+
+    # 横竖屏切换：改窗口尺寸后跑一遍事件循环，包括布局和画布指令的更新
+    size = Window.size
+    for name in ('main_menu', 'my_page', 'question_bank', 'game'):
+        sm.current = name
+        EventLoop.idle()
+        results[f'resize_{name}'] = measure(
+            lambda: [(setattr(Window, 'size', s), EventLoop.idle()) for s in ((500, 900), size)], 10)
+    sm.current = 'main_menu'
+    sm.transition = transition
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """打印对比表，返回回退的项目；基准先按两台机器的校准耗时之比缩放"""
+    regressions = []
+    scale = 1.0
+    if baseline.get('_calibration') and results.get('_calibration'):
+        scale = results['_calibration'] / baseline['_calibration']
+        print(f"本机速度系数 {scale:.2f} (基准 × 系数后再比较)")
+    print(f"{'项目':<28}{'耗时(ms)':>10}{'基准(ms)':>10}{'变化':>7}")
+    for name, value in results.items():
+        if name.startswith('_'):
+            continue
+        base = baseline.get(name)
+        if base:
+            base *= scale
+            change = value / base - 1
+            flag = ''
+            if change > tolerance and value - base > NOISE:
+                regressions.append(name)
+                flag = '  <-- 回退'
+            print(f"{name:<30}{value * 1000:>12.3f}{base * 1000:>12.3f}{change:>+9.0%}{flag}")
+        else:
+            print(f"{name:<30}{value * 1000:>12.3f}{'-':>12}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GuessGame 无界面性能基准')
+    parser.add_argument('--update', action='store_true', help='把本次结果写成新的基准')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='允许比基准慢的比例 (默认 1.0)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))  # 题库、音效用相对路径
+    sys.path.insert(0, os.getcwd())
+    from kivy.clock import Clock
+    import main as game_main
+
+    app = game_main.GuessGameApp()
+    results = {}
+    errors = []
+
+    def run(dt):
+        if app.root.current == 'welcome':
+            return  # 等欢迎界面的预加载跑完再开始
+        poll.cancel()  # 基准里会手动推进事件循环，不能再次进来
+        try:
+            results['_calibration'] = measure(calibrate, 5)
+            results.update(run_benchmarks(app, game_main))
+            # 前后各测一次取快的，单次校准碰上干扰会把所有项目一起带偏
+            results['_calibration'] = min(results['_calibration'], measure(calibrate, 5))
+        except Exception as e:
+            errors.append(e)
+            traceback.print_exc()  # KIVY_NO_CONSOLELOG 下 Kivy 不会打印
+            raise
+        finally:
+            app.stop()
+        return False
+
+    poll = Clock.schedule_interval(run, 0.1)
+    app.run()
+    if errors or not results:
+        print("基准运行失败")
+        return 2
+
+    if args.update:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({k: round(v, 7) for k, v in results.items()}, f, indent=2)
+            f.write('\n')
+        compare(results, {}, args.tolerance)
+        print(f"已写入 {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        baseline = {}
+        print(f"警告: 没有基准文件 {args.baseline}，只输出结果 (用 --update 生成)")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"性能回退: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,20 +13,25 @@ package.domain = org.test
 source.dir = .
 
 # (list) Source files to include (let empty to include all the files)
-source.include_exts = py,png,jpg,kv,atlas,json,otf,wav
+source.include_exts = py,png,jpg,kv,atlas,json,otf,wav,pack
 
 # (list) List of inclusions using pattern matching
 #source.include_patterns = assets/*,images/*.png
+# 子集字体收录的字符表，font_for() 据此判断要不要回退到完整字体
+source.include_patterns = fonts/*.txt
 
 # (list) Source files to exclude (let empty to not exclude anything)
 #source.exclude_exts = spec
 
 # (list) List of directory to exclude (let empty to not exclude anything)
 #source.exclude_dirs = tests, bin, venv
+source.exclude_dirs = tests
 
 # (list) List of exclusions using pattern matching
 # Do not prefix with './'
 #source.exclude_patterns = license,images/*/*.jpg
+# 完整字体只用于生成子集 (subset_font.py)，不打进 APK
+source.exclude_patterns = fonts/SourceHanSansSC-Regular.otf,bench.py,bench_baseline.json
 
 # (str) Application versioning (method 1)
 version = 0.1
@@ -37,7 +42,7 @@ version = 0.1
 
 # (list) Application requirements
 # comma separated e.g. requirements = sqlite3,kivy
-requirements = python3,kivy==2.3.0,plyer
+requirements = python3,kivy==2.3.0,plyer,pypinyin
 
 # (str) Custom source folders for requirements
 # Sets custom source for any requirements with recipes
@@ -0,0 +1,151 @@
+"""派生数据缓存
+
+缓存目录里只放能从原始数据重新生成的东西 (编译好的题库包、词条排版尺寸等)，
+随时清空都不会丢用户数据。按文件最近使用时间 (mtime) 做 LRU，总大小超过预算时淘汰最旧的。
+"""
+import hashlib
+import json
+import os
+
+CACHE_BUDGET = 64 * 1024 * 1024
+
+
+def file_digest(path):
+    """文件内容的哈希，用作缓存键"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class Cache:
+    def __init__(self, root, budget=CACHE_BUDGET):
+        self.root = root
+        self.budget = budget
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key):
+        """命中时返回文件路径并刷新其使用时间，否则返回 None"""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, key, write):
+        """write(临时路径) 负责生成文件，成功后原子替换到位"""
+        path = self.path(key)
+        tmp_path = path + '.tmp'
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict(keep=path)
+        return path
+
+    def entries(self):
+        result = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            result.append((st.st_mtime, st.st_size, path))
+        return result
+
+    def usage(self):
+        """(总字节数, 文件数)"""
+        entries = self.entries()
+        return sum(size for _, size, _ in entries), len(entries)
+
+    def evict(self, keep=None):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.budget:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """删除全部缓存文件，返回释放的字节数"""
+        freed = 0
+        for _, size, path in self.entries():
+            try:
+                os.remove(path)
+                freed += size
+            except OSError:
+                pass
+        return freed
+
+
+class LayoutMetrics:
+    """词条在指定字体、字号下渲染出的纹理尺寸，以及在各容器尺寸下自适应的字号，存在缓存目录里，下次启动直接复用"""
+
+    def __init__(self, cache, font, font_size):
+        key = hashlib.md5(f"{font}|{font_size}".encode('utf-8')).hexdigest()[:16]
+        self.cache = cache
+        self.key = f"metrics2-{key}.json"  # 旧格式 (只有尺寸) 的文件不再读取，由 LRU 淘汰
+        self.sizes = {}
+        self.fits = {}  # "宽x高" -> {词条: 字号}
+        self.dirty = False
+        path = cache.get(self.key)
+        if path:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.sizes = data['sizes']
+                self.fits = data['fits']
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+
+    def get(self, word):
+        return self.sizes.get(word)
+
+    def set(self, word, size):
+        size = [int(size[0]), int(size[1])]
+        if self.sizes.get(word) != size:
+            self.sizes[word] = size
+            self.dirty = True
+
+    def fit_table(self, box):
+        """容器尺寸 box 下的 {词条: 字号}，直接在返回的字典上查找和填写"""
+        key = f"{int(box[0])}x{int(box[1])}"
+        table = self.fits.get(key)
+        if table is None:
+            table = self.fits[key] = {}
+        return table
+
+    def set_fit(self, table, word, font_size):
+        table[word] = font_size
+        self.dirty = True
+
+    def clear(self):
+        self.sizes = {}
+        for table in self.fits.values():
+            table.clear()  # 界面上还拿着这些字典，清空而不是换掉
+        self.dirty = False
+
+    def save(self):
+        if not self.dirty:
+            return
+
+        def write(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'sizes': self.sizes, 'fits': self.fits}, f, ensure_ascii=False)
+        self.cache.put(self.key, write)
+        self.dirty = False
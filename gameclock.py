@@ -0,0 +1,109 @@
+"""对局时钟
+
+GameScreen 的倒计时、计时、重力感应轮询、冷却、结束后跳转都挂在同一个 GameClock 上。
+所有到期时间都按 time.monotonic() 计算，不累加每帧的 dt，卡顿之后也不会漂移；
+任意时刻只占用一个 Kivy Clock 事件，睡到最近一个到期的定时器为止。
+
+回放 trace 时改用 VirtualTime：时间只在触发定时器时跳到它的到期时刻，和 ReplayAccelerometer 共用，
+每次轮询看到的采样、每个定时器的先后都与帧率和卡顿无关，同一个 trace 每次回放的手势和得分都一样。
+"""
+import heapq
+import time
+
+from kivy.clock import Clock
+
+
+class Timer:
+    __slots__ = ('deadline', 'callback', 'interval', 'cancelled')
+
+    def __init__(self, deadline, callback, interval):
+        self.deadline = deadline
+        self.callback = callback
+        self.interval = interval
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class VirtualTime:
+    """可注入的时间源：调用返回当前虚拟时间，由 GameClock 推进"""
+
+    def __init__(self, start=0.0):
+        self.t = start
+
+    def __call__(self):
+        return self.t
+
+    def advance(self, t):
+        if t > self.t:
+            self.t = t
+
+
+class GameClock:
+    """单调时钟驱动的定时器堆，回调参数为当前时间 now"""
+
+    def __init__(self, time_source=time.monotonic):
+        self.now = time_source
+        self.heap = []  # (到期时间, 序号, Timer)
+        self.seq = 0
+        self.event = None
+        self.phase = 'idle'  # countdown / play / cooldown / over
+        self.virtual = isinstance(time_source, VirtualTime)
+
+    def after(self, delay, callback):
+        return self.at(self.now() + delay, callback)
+
+    def at(self, deadline, callback):
+        return self._push(Timer(deadline, callback, None))
+
+    def every(self, interval, callback):
+        """周期定时器：按固定节拍对齐，掉帧后跳过错过的节拍而不是连发"""
+        return self._push(Timer(self.now() + interval, callback, interval))
+
+    def stop(self):
+        """取消全部定时器，回到 idle"""
+        for _, _, timer in self.heap:
+            timer.cancel()
+        self.heap.clear()
+        if self.event:
+            self.event.cancel()
+            self.event = None
+        self.phase = 'idle'
+
+    def _push(self, timer):
+        self.seq += 1
+        heapq.heappush(self.heap, (timer.deadline, self.seq, timer))
+        if self.heap[0][2] is timer:
+            self._schedule()
+        return timer
+
+    def _schedule(self):
+        if self.event:
+            self.event.cancel()
+            self.event = None
+        while self.heap and self.heap[0][2].cancelled:
+            heapq.heappop(self.heap)
+        if self.heap:
+            self.event = Clock.schedule_once(self._fire, max(0, self.heap[0][0] - self.now()))
+
+    def _fire(self, dt):
+        self.event = None
+        if self.virtual:
+            # 虚拟时间不随真实时间流逝，直接跳到最早的到期时刻，一次只触发这一个时刻的定时器
+            while self.heap and self.heap[0][2].cancelled:
+                heapq.heappop(self.heap)
+            if self.heap:
+                self.now.advance(self.heap[0][0])
+        now = self.now()
+        while self.heap and self.heap[0][0] <= now:
+            _, _, timer = heapq.heappop(self.heap)
+            if timer.cancelled:
+                continue
+            if timer.interval:
+                missed = int((now - timer.deadline) // timer.interval)
+                timer.deadline += (missed + 1) * timer.interval
+                self.seq += 1
+                heapq.heappush(self.heap, (timer.deadline, self.seq, timer))
+            timer.callback(now)
+        self._schedule()
@@ -0,0 +1,321 @@
+"""重力感应手势识别、采样录制与回放
+
+手机贴在额头上：屏幕朝下翻 (z 轴明显为负) 算答对，朝上翻 (z 轴明显为正) 算跳过。
+TiltDetector 只处理 (时间, z) 采样，不依赖 Kivy / plyer，方便离线回放测试。
+
+采样来源统一提供 enable() / disable() / drain()：drain() 取走上次以来的全部采样 [(t, x, y, z), ...]，
+t 是采样本身的时刻 (换算到对局时钟的时间轴)，GameScreen 逐个喂给 TiltDetector，轮询的快慢只影响反应延迟，
+不影响识别结果。period 是来源的采样周期，轮询比它快没有意义。
+    AndroidAccelerometer  安卓上直接注册 SensorEventListener (SENSOR_DELAY_GAME)，事件带传感器时间戳
+    PolledAccelerometer   包装 plyer accelerometer (安卓上是 SENSOR_DELAY_NORMAL，约 200ms 才有一个新值)
+
+录制/回放 (通过环境变量接入 main.py)：
+    GUESS_TRACE_RECORD=rounds.trace  真机上录下每局的加速度采样
+    GUESS_TRACE_REPLAY=rounds.trace  桌面上用录好的采样代替 plyer，逐局回放
+离线统计：python gesture.py rounds.trace
+"""
+import bisect
+import struct
+import sys
+import time
+from collections import deque
+
+from profiler import latency_stats
+
+TRIGGER = 7.0  # 触发阈值 (m/s²)，与原来的 ±7 一致
+REARM = 3.0  # 回到 |z| 小于该值 (大致竖直) 才允许下一次触发
+TAU = 0.03  # 低通滤波时间常数 (秒)
+REFRACTORY = 0.15  # 两次触发的最短间隔，防止回弹误触
+
+
+class TiltDetector:
+    """低通滤波 + 迟滞：越过 TRIGGER 触发，回到 REARM 以内重新上膛"""
+
+    def __init__(self, trigger=TRIGGER, rearm=REARM, tau=TAU, refractory=REFRACTORY, buffer_size=64):
+        self.trigger = trigger
+        self.rearm = rearm
+        self.tau = tau
+        self.refractory = refractory
+        self.samples = deque(maxlen=buffer_size)  # 最近的 (t, z) 原始采样
+        self.latencies = deque(maxlen=256)  # 最近若干次的识别延迟 (秒)
+        self.reset()
+
+    def reset(self):
+        self.samples.clear()
+        self.filtered = None
+        self.armed = True
+        self.crossed_at = None  # 原始值本次越过阈值的时刻
+        self.last_fire = None
+
+    def feed(self, t, z):
+        """喂入一个采样，识别到手势时返回 'correct' / 'wrong'，否则返回 None"""
+        if self.filtered is None:
+            self.filtered = z
+        else:
+            dt = max(0.0, t - self.samples[-1][0])
+            self.filtered += dt / (self.tau + dt) * (z - self.filtered)
+        self.samples.append((t, z))
+        level = abs(self.filtered)
+
+        if abs(z) >= self.trigger:
+            if self.crossed_at is None:
+                self.crossed_at = t
+        else:
+            self.crossed_at = None
+
+        if not self.armed:
+            if level < self.rearm:
+                self.armed = True
+            return None
+
+        if level < self.trigger or (self.last_fire is not None and t - self.last_fire < self.refractory):
+            return None
+
+        self.armed = False
+        self.last_fire = t
+        self.latencies.append(t - (self.crossed_at if self.crossed_at is not None else t))
+        return 'correct' if self.filtered < 0 else 'wrong'
+
+    def stats(self):
+        """识别延迟统计 (毫秒)：从原始值越过阈值到判定触发"""
+        return latency_stats(self.latencies)
+
+
+# ==================== 采样来源 ====================
+def _sensor_listener(callback):
+    from jnius import PythonJavaClass, java_method
+
+    class Listener(PythonJavaClass):
+        __javainterfaces__ = ['android/hardware/SensorEventListener']
+        __javacontext__ = 'app'
+
+        @java_method('(Landroid/hardware/SensorEvent;)V')
+        def onSensorChanged(self, event):
+            callback(event.timestamp, event.values)
+
+        @java_method('(Landroid/hardware/Sensor;I)V')
+        def onAccuracyChanged(self, sensor, accuracy):
+            pass
+
+    return Listener()
+
+
+class AndroidAccelerometer:
+    """通过 jnius 直接向 SensorManager 注册加速度监听
+
+    回调在安卓的 Java 线程上执行，只往 deque 里追加 (线程安全)，drain() 在主线程上取走。
+    事件时间戳与 SystemClock.elapsedRealtimeNanos() 同源，enable() 时算好与 time_source 的差值换算过去。
+    """
+    period = 0.02  # SENSOR_DELAY_GAME
+
+    def __init__(self, time_source=time.monotonic):
+        from jnius import autoclass
+        activity = autoclass('org.kivy.android.PythonActivity').mActivity
+        Context = autoclass('android.content.Context')
+        Sensor = autoclass('android.hardware.Sensor')
+        self.delay = autoclass('android.hardware.SensorManager').SENSOR_DELAY_GAME
+        self.clock = autoclass('android.os.SystemClock')
+        self.manager = activity.getSystemService(Context.SENSOR_SERVICE)
+        self.sensor = self.manager.getDefaultSensor(Sensor.TYPE_ACCELEROMETER)
+        if self.sensor is None:
+            raise RuntimeError("没有加速度传感器")
+        self.now = time_source
+        self.queue = deque(maxlen=512)
+        self.offset = 0.0
+        self.listener = _sensor_listener(self.on_event)  # 必须一直持有引用，否则 Java 端回调时对象已被回收
+
+    def on_event(self, timestamp, values):
+        self.queue.append((timestamp * 1e-9 + self.offset, values[0], values[1], values[2]))
+
+    def enable(self):
+        self.offset = self.now() - self.clock.elapsedRealtimeNanos() * 1e-9
+        self.queue.clear()
+        self.manager.registerListener(self.listener, self.sensor, self.delay)
+
+    def disable(self):
+        self.manager.unregisterListener(self.listener)
+        self.queue.clear()
+
+    def drain(self):
+        samples = []
+        while self.queue:
+            samples.append(self.queue.popleft())
+        return samples
+
+
+class PolledAccelerometer:
+    """包装只能读最新值的 plyer accelerometer：drain() 读到新值时，按读取时刻返回一个采样"""
+    period = 0.2  # plyer 在安卓上注册的是 SENSOR_DELAY_NORMAL
+
+    def __init__(self, source, time_source=time.monotonic):
+        self.source = source
+        self.now = time_source
+        self.last = None
+
+    def enable(self):
+        self.source.enable()
+        self.last = None
+
+    def disable(self):
+        self.source.disable()
+
+    def drain(self):
+        val = self.source.acceleration
+        # 传感器两次上报之间读到的是同一个值，跳过
+        if not val or None in val or val == self.last:
+            return []
+        self.last = val
+        return [(self.now(), *val)]
+
+
+# ==================== 录制与回放 ====================
+TRACE_MAGIC = b'GGTR'
+TRACE_HEADER = struct.Struct('<4sH')
+TRACE_RECORD = struct.Struct('<ffff')  # 局内相对时间 t, x, y, z；t < 0 表示新的一局开始
+
+
+class TraceRecorder:
+    """包装采样来源，drain() 取走的采样同时追加到 trace 文件"""
+
+    def __init__(self, source, path, time_source=time.monotonic):
+        self.source = source
+        self.now = time_source
+        self.file = open(path, 'wb')
+        self.file.write(TRACE_HEADER.pack(TRACE_MAGIC, 1))
+        self.start = None
+
+    @property
+    def period(self):
+        return self.source.period
+
+    def enable(self):
+        self.source.enable()
+        # 每次 enable 对应一局，时间从 0 重新算
+        self.file.write(TRACE_RECORD.pack(-1, 0, 0, 0))
+        self.start = self.now()
+
+    def disable(self):
+        self.source.disable()
+        self.start = None
+        self.file.flush()
+
+    def drain(self):
+        samples = self.source.drain()
+        if self.start is not None:
+            for t, x, y, z in samples:
+                self.file.write(TRACE_RECORD.pack(max(0.0, t - self.start), x, y, z))
+        return samples
+
+    def close(self):
+        self.file.close()
+
+
+def read_trace(path):
+    """读出 trace 文件，按局返回 [[(t, x, y, z), ...], ...]"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, _ = TRACE_HEADER.unpack_from(data, 0)
+    if magic != TRACE_MAGIC:
+        raise ValueError(f"{path} 不是加速度 trace 文件")
+    rounds = []
+    for record in TRACE_RECORD.iter_unpack(data[TRACE_HEADER.size:]):
+        if record[0] < 0:
+            rounds.append([])
+        elif rounds:
+            rounds[-1].append(record)
+    return rounds
+
+
+class ReplayAccelerometer:
+    """桌面上代替真实传感器：每次 enable() 按时间戳回放 trace 里的下一局"""
+
+    def __init__(self, path, time_source=time.monotonic):
+        self.rounds = read_trace(path)
+        self.now = time_source
+        self.round = -1
+        self.samples = []
+        self.pos = 0
+        self.start = None
+        # 按录下的平均采样间隔轮询
+        count = sum(len(r) for r in self.rounds)
+        duration = sum(r[-1][0] for r in self.rounds if r)
+        self.period = duration / count if count and duration else 0.02
+
+    def enable(self):
+        self.round += 1
+        self.samples = self.rounds[self.round % len(self.rounds)] if self.rounds else []
+        self.pos = 0
+        self.start = self.now()
+
+    def disable(self):
+        self.start = None
+
+    def drain(self):
+        """到当前时刻为止还没取走的全部采样，时刻换算成 time_source 的时间轴"""
+        if self.start is None:
+            return []
+        t = self.now() - self.start
+        samples = []
+        while self.pos < len(self.samples) and self.samples[self.pos][0] <= t:
+            st, x, y, z = self.samples[self.pos]
+            samples.append((self.start + st, x, y, z))
+            self.pos += 1
+        return samples
+
+
+def replay(samples, poll=None, rebound=0.5, **detector_args):
+    """离线确定性回放一局。poll 为 None 时每个采样都喂给识别器，否则模拟按 poll 秒轮询。
+
+    返回 (手势列表 [(t, 手势)], 延迟统计, 回弹误触次数)。
+    延迟按完整采样里原始值越过阈值的时刻算，因此包含轮询带来的延迟。
+    回弹误触：上一次触发后 rebound 秒内出现的反方向触发。
+    """
+    detector = TiltDetector(**detector_args)
+    events = []
+    if poll is None:
+        ticks = ((t, z) for t, _, _, z in samples)
+    else:
+        ticks = []
+        pos = 0
+        end = samples[-1][0] if samples else 0
+        for k in range(int(end / poll) + 1):
+            t = k * poll
+            while pos + 1 < len(samples) and samples[pos + 1][0] <= t:
+                pos += 1
+            if samples and samples[pos][0] <= t and (not ticks or ticks[-1][1] != samples[pos][3]):
+                ticks.append((t, samples[pos][3]))
+    for t, z in ticks:
+        gesture = detector.feed(t, z)
+        if gesture:
+            events.append((t, gesture))
+    crossings = []
+    above = False
+    for t, _, _, z in samples:
+        if abs(z) >= detector.trigger and not above:
+            crossings.append(t)
+        above = abs(z) >= detector.trigger
+    latencies = []
+    for t, _ in events:
+        k = bisect.bisect_right(crossings, t)
+        if k:
+            latencies.append(t - crossings[k - 1])
+
+    false_triggers = sum(1 for (t0, g0), (t1, g1) in zip(events, events[1:]) if g0 != g1 and t1 - t0 < rebound)
+    return events, latency_stats(latencies), false_triggers
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("用法: python gesture.py <trace 文件> [轮询间隔秒]")
+        sys.exit(1)
+    poll = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    for i, samples in enumerate(read_trace(sys.argv[1])):
+        events, stats, false_triggers = replay(samples, poll)
+        duration = samples[-1][0] if samples else 0
+        rate = len(samples) / duration if duration else 0
+        print(f"第 {i + 1} 局: {len(samples)} 个采样 ({rate:.0f}Hz), {duration:.1f} 秒, "
+              f"答对 {sum(g == 'correct' for _, g in events)}, 跳过 {sum(g == 'wrong' for _, g in events)}, "
+              f"回弹误触 {false_triggers}")
+        if stats['count']:
+            print(f"    识别延迟 ms: 平均 {stats['mean']:.0f}, p50 {stats['p50']:.0f}, "
+                  f"p95 {stats['p95']:.0f}, 最大 {stats['max']:.0f}")
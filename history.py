@@ -0,0 +1,132 @@
+"""对局历史记录
+
+每局结束追加一行 JSON 到 rounds.log (只追加，不重写)；
+统计数据 (总局数、各模式平均得分、各类别各目标的最佳成绩) 增量维护，
+定期连同已统计到的日志偏移量一起写入 summary.json。
+打开时读取 summary.json，只需重放偏移量之后的少量日志，几千局之后也能立即打开。
+"""
+import json
+import os
+import time
+
+SNAPSHOT_EVERY = 20  # 每追加多少局写一次统计快照
+
+
+class HistoryStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.log_path = os.path.join(root, 'rounds.log')
+        self.summary_path = os.path.join(root, 'summary.json')
+        self.summary = {'offset': 0, 'rounds': 0, 'modes': {}, 'best': {}}
+        self.dirty = 0
+        self.load()
+        self.log = open(self.log_path, 'a', encoding='utf-8', newline='\n')
+
+    def load(self):
+        try:
+            with open(self.summary_path, 'r', encoding='utf-8') as f:
+                self.summary = json.load(f)
+        except (OSError, ValueError):
+            pass
+        # 重放快照之后追加的记录 (日志比快照短说明被清空过，从头统计)
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() < self.summary['offset']:
+                    self.summary = {'offset': 0, 'rounds': 0, 'modes': {}, 'best': {}}
+                f.seek(self.summary['offset'])
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # 上次写到一半退出，丢弃残行
+                    self.summary['offset'] += len(line)
+                    try:
+                        self.apply(json.loads(line))
+                    except (ValueError, KeyError):
+                        continue
+                    self.dirty += 1
+        except OSError:
+            pass
+
+    def apply(self, record):
+        """把一局计入统计"""
+        s = self.summary
+        s['rounds'] += 1
+        mode = s['modes'].setdefault(record['mode'], {'count': 0, 'score_sum': 0})
+        mode['count'] += 1
+        mode['score_sum'] += record['score']
+
+        key = f"{record['mode']}|{record['category']}|{record['target']}"
+        best = s['best'].get(key)
+        if record['mode'] == 'time':
+            # 倒计时模式比得分
+            if best is None or record['score'] > best:
+                s['best'][key] = record['score']
+        elif record['score'] >= record['target']:
+            # 竞速模式比完成用时
+            if best is None or record['time'] < best:
+                s['best'][key] = record['time']
+
+    def append(self, mode, category, target, score, elapsed):
+        record = {'t': int(time.time()), 'mode': mode, 'category': category, 'target': target,
+                  'score': score, 'time': round(elapsed, 2)}
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        self.log.write(line)
+        self.log.flush()
+        self.summary['offset'] += len(line.encode('utf-8'))
+        self.apply(record)
+        self.dirty += 1
+        if self.dirty >= SNAPSHOT_EVERY:
+            self.save()
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.summary_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary, f, ensure_ascii=False)
+        os.replace(tmp_path, self.summary_path)
+        self.dirty = 0
+
+    def close(self):
+        self.save()
+        self.log.close()
+
+    # ==================== 查询 ====================
+    def average_score(self, mode):
+        m = self.summary['modes'].get(mode)
+        return m['score_sum'] / m['count'] if m and m['count'] else 0
+
+    def best(self, mode=None):
+        """[(模式, 类别, 目标, 最佳成绩), ...]"""
+        result = []
+        for key, value in self.summary['best'].items():
+            m, rest = key.split('|', 1)
+            category, target = rest.rsplit('|', 1)
+            if mode is None or m == mode:
+                result.append((m, category, int(target), value))
+        return result
+
+    def recent(self, n=10):
+        """最近 n 局 (新的在前)，只读日志末尾"""
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                block = 4096
+                data = b''
+                while size > 0 and data.count(b'\n') <= n:
+                    step = min(block, size)
+                    size -= step
+                    f.seek(size)
+                    data = f.read(step) + data
+                    block *= 2
+        except OSError:
+            return []
+        records = []
+        for line in reversed(data.splitlines()[-n:]):
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
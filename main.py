@@ -1,74 +1,209 @@
-from kivy.app import App
-from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.label import Label
-from kivy.uix.button import Button
-from kivy.uix.screenmanager import ScreenManager, Screen
-from kivy.uix.gridlayout import GridLayout
-from kivy.uix.modalview import ModalView
-from kivy.uix.behaviors import ButtonBehavior
-from kivy.clock import Clock
-from kivy.config import Config
-from kivy.core.window import Window
-from kivy.graphics import Color, Rectangle, Line, RoundedRectangle
-from kivy.core.audio import SoundLoader
-from kivy.properties import StringProperty, NumericProperty
-import json
+import profiler  # 最先导入：启动耗时从这里开始计
+
+with profiler.phase('import kivy'):
+    from kivy.app import App
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy.uix.label import Label
+    from kivy.uix.button import Button
+    from kivy.uix.screenmanager import ScreenManager, Screen
+    from kivy.uix.gridlayout import GridLayout
+    from kivy.uix.behaviors import ButtonBehavior
+    from kivy.clock import Clock
+    from kivy.utils import platform
+    from kivy.config import Config
+    from kivy.core.text import Label as CoreLabel
+    from kivy.properties import StringProperty, NumericProperty, BooleanProperty, ObjectProperty, ColorProperty, ListProperty
+    from kivy.lang import Builder
+    from kivy.uix.progressbar import ProgressBar
+from collections import deque
 import os
-import random
+import threading
+import time
+
+with profiler.phase('import app modules'):
+    from gameclock import GameClock, VirtualTime
+    from gesture import TiltDetector
+    from preload import Preloader, read_file
+    from sampler import DeckStore, WeightedDeck, WordStats
+    from search import CategoryIndex
+    from subset_font import FULL_FONT, SUBSET_FONT, SUBSET_CHARS
+    from wordbank import BankImporter, JsonWordBank, MergedWordBank, WordTable, DEFAULT_BANK, find_pack
 
 # ==================== 环境配置 ====================
-try:
-    from plyer import accelerometer
-except ImportError:
-    accelerometer = None
+with profiler.phase('create window'):
+    from kivy.core.window import Window
+    Config.set('graphics', 'width', '900')
+    Config.set('graphics', 'height', '500')
+    Window.clearcolor = (1, 1, 1, 1)
+
+# 优先用打包前生成的子集字体，子集里没有的字 (如自定义题库) 回退到完整字体；
+# APK 里不带完整字体时，回退到安卓系统自带的中文字体
+FALLBACK_FONTS = [FULL_FONT, '/system/fonts/NotoSansCJK-Regular.ttc', '/system/fonts/DroidSansFallback.ttf']
+CHINESE_FONT = next((f for f in [SUBSET_FONT] + FALLBACK_FONTS if os.path.exists(f)), None)
+if CHINESE_FONT is None:
+    print(f"警告: 字体文件 {FULL_FONT} 不存在！将在手机上使用默认字体。")
+FALLBACK_FONT = next((f for f in FALLBACK_FONTS if os.path.exists(f)), None)
+_subset_chars = None
+
+QUESTION_FONT_SIZE = 60  # 题目字号上限，放不下时按容器尺寸缩小
+MIN_QUESTION_FONT_SIZE = 28  # 缩到这么小还放不下就折行
+FIT_MARGIN = 0.9  # 题目最多占容器宽高的比例
+WARM_BUDGET = 0.004  # 每帧预先计算自适应字号的时间上限 (秒)
+PREFETCH_DEPTH = 3  # 预渲染的后续题目数
+# 重力感应轮询间隔：每次取走期间的全部采样 (带各自的时间戳)，轮询快慢只影响反应延迟；
+# 不会比采样来源的 period 更快 (plyer 约 200ms 才有新值，再快只是重复读)
+SENSOR_INTERVAL = 0.05
+SAVING_SENSOR_INTERVALS = {'play': 0.1, 'cooldown': 0.2}  # 省电模式：出题时 10Hz，等手机回正时 5Hz
+MENU_SCREENS = ('main_menu', 'question_bank', 'my_page')  # 省电模式下空闲时限帧的界面
+SOUNDS = ('correct', 'wrong')  # audio/<名称>.wav
+SPLASH_MIN = 0.8  # 欢迎界面最短显示时间 (秒)
+SPLASH_MAX = 5.0  # 预加载卡住时最多等这么久，剩下的等用到时再加载
+
+_accelerometer = False  # False 表示尚未加载
+
+
+def font_for(text):
+    """子集字体能显示 text 就用子集字体，否则用回退字体"""
+    global _subset_chars
+    if CHINESE_FONT != SUBSET_FONT or not FALLBACK_FONT:
+        return CHINESE_FONT if CHINESE_FONT else 'Roboto'
+    if _subset_chars is None:
+        try:
+            with open(SUBSET_CHARS, 'r', encoding='utf-8') as f:
+                _subset_chars = frozenset(f.read())
+        except OSError:
+            _subset_chars = frozenset()
+    return CHINESE_FONT if all(c in _subset_chars for c in text) else FALLBACK_FONT
+
+
+def get_accelerometer():
+    """延迟加载重力感应采样来源（安卓上会初始化 jnius，拖慢启动），接口见 gesture.py
+
+    安卓上直接注册传感器监听，失败时退回 plyer。
+    设置 GUESS_TRACE_REPLAY 时改用录好的 trace 回放，设置 GUESS_TRACE_RECORD 时边玩边录制。
+    """
+    global _accelerometer
+    if _accelerometer is False:
+        from gesture import AndroidAccelerometer, PolledAccelerometer, ReplayAccelerometer, TraceRecorder
+        if os.environ.get('GUESS_TRACE_REPLAY'):
+            _accelerometer = ReplayAccelerometer(os.environ['GUESS_TRACE_REPLAY'], time_source=VirtualTime())
+            return _accelerometer
+        _accelerometer = None
+        if platform == 'android':
+            try:
+                _accelerometer = AndroidAccelerometer()
+            except Exception as e:
+                print(f"警告: 无法注册加速度传感器 ({e})，改用 plyer")
+        if _accelerometer is None:
+            try:
+                from plyer import accelerometer
+                _accelerometer = PolledAccelerometer(accelerometer)
+            except ImportError:
+                pass
+        if _accelerometer and os.environ.get('GUESS_TRACE_RECORD'):
+            _accelerometer = TraceRecorder(_accelerometer, os.environ['GUESS_TRACE_RECORD'])
+    return _accelerometer
 
-Config.set('graphics', 'width', '900')
-Config.set('graphics', 'height', '500')
-Window.clearcolor = (1, 1, 1, 1)
 
-CHINESE_FONT = 'fonts/SourceHanSansSC-Regular.otf'
-if not os.path.exists(CHINESE_FONT):
-    print(f"警告: 字体文件 {CHINESE_FONT} 不存在！将在手机上使用默认字体。")
-    CHINESE_FONT = None
+def game_time_source():
+    """对局时钟的时间源：回放 trace 时与 ReplayAccelerometer 共用同一个虚拟时间 (见 gameclock.py)"""
+    if os.environ.get('GUESS_TRACE_REPLAY'):
+        return get_accelerometer().now
+    return time.monotonic
 
 
 # ==================== 通用 UI 组件 ====================
+# 背景、边框跟随控件位置和尺寸的画布指令统一写成 KV 规则：由 Builder 编译好的绑定直接更新指令，
+# 不再每个实例各挂一对 pos/size 回调 (横竖屏切换时几十个 Python 回调挨个跑)
+Builder.load_string('''
+<RoundedButton>:
+    background_normal: ''
+    background_color: 0, 0, 0, 0
+    canvas.before:
+        Color:
+            rgba: self.bg_color
+        RoundedRectangle:
+            pos: self.pos
+            size: self.size
+            radius: self.radius
+
+<RoundedBox>:
+    canvas.before:
+        Color:
+            rgba: self.bg_color
+        RoundedRectangle:
+            pos: self.pos
+            size: self.size
+            radius: self.radius
+
+<OutlineButton>:
+    color: 0, 0, 0, 1
+    background_color: 0, 0, 0, 0
+    canvas.before:
+        Color:
+            rgba: 0, 0, 0, 1
+        Line:
+            rounded_rectangle: self.x, self.y, self.width, self.height, 10
+            width: 1.5
+
+<BorderBox>:
+    canvas.before:
+        Color:
+            rgba: 0, 0, 0, 1
+        Line:
+            rectangle: self.x, self.y, self.width, self.height
+            width: 2
+
+<BgScreen>:
+    canvas.before:
+        Color:
+            rgba: self.bg_color
+        Rectangle:
+            pos: self.pos
+            size: self.size
+''')
+
+
 class RoundedButton(Button):
     """通用圆角按钮"""
+    bg_color = ColorProperty((0.2, 0.6, 1, 1))
+    radius = ListProperty([20])
 
-    def __init__(self, bg_color=(0.2, 0.6, 1, 1), radius=[20, ], **kwargs):
-        super().__init__(**kwargs)
-        self.background_normal = ''
-        self.background_color = (0, 0, 0, 0)
-        self.bg_color_value = bg_color
-        self.radius_value = radius
+    def set_bg_color(self, color):
+        """原地修改背景色，不重建画布指令"""
+        self.bg_color = color
 
-        with self.canvas.before:
-            Color(*self.bg_color_value)
-            self.rect = RoundedRectangle(size=self.size, pos=self.pos, radius=self.radius_value)
-        self.bind(pos=self.update_rect, size=self.update_rect)
 
-    def update_rect(self, instance, value):
-        self.rect.pos = instance.pos
-        self.rect.size = instance.size
+class RoundedBox(BoxLayout):
+    """带圆角背景的 BoxLayout (卡片、弹窗面板、列表项)"""
+    bg_color = ColorProperty((0.2, 0.2, 0.25, 1))
+    radius = ListProperty([20])
 
 
-class MenuItem(ButtonBehavior, BoxLayout):
+class OutlineButton(Button):
+    """透明底、黑色圆角描边的按钮 (答题界面)"""
+
+
+class BorderBox(BoxLayout):
+    """带黑色矩形边框的 BoxLayout"""
+
+
+class BgScreen(Screen):
+    """纯色背景的界面"""
+    bg_color = ColorProperty((0.15, 0.15, 0.18, 1))
+
+
+class MenuItem(ButtonBehavior, RoundedBox):
     """'我的'界面列表项"""
 
     def __init__(self, text, callback, color=(0.25, 0.25, 0.3, 1), **kwargs):
-        super().__init__(**kwargs)
+        super().__init__(bg_color=color, radius=[10], **kwargs)
         self.orientation = 'horizontal'
         self.size_hint_y = None
         self.height = 80
         self.padding = [20, 0, 20, 0]
         self.callback = callback
 
-        with self.canvas.before:
-            Color(*color)
-            self.rect = RoundedRectangle(size=self.size, pos=self.pos, radius=[10, ])
-        self.bind(pos=self.update_rect, size=self.update_rect)
-
         lbl = Label(text=text, font_size=24, halign='left', valign='middle', text_size=(self.width, None),
                     font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
         lbl.bind(size=lbl.setter('text_size'))
@@ -77,27 +212,60 @@ class MenuItem(ButtonBehavior, BoxLayout):
         arrow = Label(text=">", font_size=24, size_hint_x=None, width=50, color=(0.6, 0.6, 0.6, 1))
         self.add_widget(arrow)
 
-    def update_rect(self, instance, value):
-        self.rect.pos = instance.pos
-        self.rect.size = instance.size
-
     def on_release(self):
         if self.callback: self.callback()
 
 
-class SettingsPopup(ModalView):
-    """设置弹窗 (支持两种模式切换)"""
+class QuestionLabel(Label):
+    """题目标签：可以直接换上预渲染好的纹理，跳过排版和光栅化"""
+
+    def show_texture(self, texture):
+        # 取消之前 text/font_size 变化触发的重绘，否则下一帧会覆盖掉这张纹理
+        self._trigger_texture.cancel()
+        self.texture = texture
+        self.texture_size = list(texture.size)
+
+    def show_text(self, text, font_size):
+        # 结算画面带着其他玩家的名字，子集字体里不一定有
+        self.font_name = font_for(text)
+        self.text = text
+        self.font_size = font_size
+        # 文字没变时也要重绘，当前显示的可能是预渲染纹理
+        self._trigger_texture()
+
+
+class PopupPanel(RoundedBox):
+    """弹窗内容面板 (深色圆角背景)，首次 open() 时才导入并创建 ModalView 外壳"""
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.size_hint = (0.7, 0.7)
-        self.background_color = (0, 0, 0, 0.5)
-        self.app = App.get_running_app()
+        self.view = None
 
-        with self.canvas.before:
-            Color(0.2, 0.2, 0.25, 1)
-            self.rect = RoundedRectangle(size=self.size, pos=self.pos, radius=[20, ])
-        self.bind(pos=self.update_rect, size=self.update_rect)
+    def open(self, *args):
+        if self.view is None:
+            from kivy.uix.modalview import ModalView
+            self.view = ModalView(size_hint=(0.7, 0.7), background_color=(0, 0, 0, 0.5))
+            self.view.add_widget(self)
+        self.view.open()
+
+    def dismiss(self, *args):
+        if self.view: self.view.dismiss()
+
+
+class SettingsPopup(PopupPanel):
+    """设置弹窗 (支持两种模式切换)，全局只创建一次，用 SettingsPopup.get() 获取"""
+
+    _instance = None
+
+    @classmethod
+    def get(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.app = App.get_running_app()
 
         self.layout = BoxLayout(orientation='vertical', padding=20, spacing=20)
 
@@ -109,10 +277,10 @@ class SettingsPopup(ModalView):
         # === 模式切换按钮区 ===
         mode_layout = BoxLayout(orientation='horizontal', spacing=10, size_hint=(1, 0.15))
 
-        self.btn_mode_time = RoundedButton(text="倒计时模式", font_name=CHINESE_FONT)
+        self.btn_mode_time = RoundedButton(text="倒计时模式", font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
         self.btn_mode_time.bind(on_press=lambda x: self.switch_mode('time'))
 
-        self.btn_mode_score = RoundedButton(text="竞速模式", font_name=CHINESE_FONT)
+        self.btn_mode_score = RoundedButton(text="竞速模式", font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
         self.btn_mode_score.bind(on_press=lambda x: self.switch_mode('score'))
 
         mode_layout.add_widget(self.btn_mode_time)
@@ -121,15 +289,43 @@ class SettingsPopup(ModalView):
 
         # === 说明文字 ===
         self.desc_lbl = Label(text="", font_size=18, color=(0.8, 0.8, 0.8, 1), size_hint=(1, 0.1),
-                              font_name=CHINESE_FONT)
+                              font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
         self.layout.add_widget(self.desc_lbl)
 
-        # === 选项网格 (动态生成) ===
-        self.options_grid = GridLayout(cols=2, spacing=15, size_hint=(1, 0.4))
+        # === 出题方式 ===
+        sample_layout = BoxLayout(orientation='horizontal', spacing=10, size_hint=(1, 0.12))
+        self.sample_btns = {}
+        for mode, text in (('random', '随机'), ('balanced', '均衡'), ('hard', '只出难题')):
+            btn = RoundedButton(text=text, font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
+            btn.bind(on_press=lambda x, mode=mode: self.switch_sample_mode(mode))
+            self.sample_btns[mode] = btn
+            sample_layout.add_widget(btn)
+        self.layout.add_widget(sample_layout)
+
+        # === 选项网格 (四个按钮只建一次，切换时原地改文字和颜色) ===
+        self.options_grid = GridLayout(cols=2, spacing=15, size_hint=(1, 0.25))
+        self.options = []
+        self.option_btns = []
+        for i in range(4):
+            btn = RoundedButton(text="", font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
+            btn.bind(on_press=lambda x, i=i: self.set_target(self.options[i], self.unit))
+            self.option_btns.append(btn)
+            self.options_grid.add_widget(btn)
         self.layout.add_widget(self.options_grid)
 
+        # === 省电模式 ===
+        power_layout = BoxLayout(orientation='horizontal', spacing=10, size_hint=(1, 0.08))
+        self.btn_power = RoundedButton(text="省电模式", size_hint_x=0.4,
+                                       font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
+        self.btn_power.bind(on_press=lambda x: self.switch_power(not self.app.power_saving))
+        self.wakeups_lbl = Label(text="", font_size=16, color=(0.8, 0.8, 0.8, 1),
+                                 font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
+        power_layout.add_widget(self.btn_power)
+        power_layout.add_widget(self.wakeups_lbl)
+        self.layout.add_widget(power_layout)
+
         # === 关闭按钮 ===
-        close_btn = Button(text="保存并关闭", size_hint=(1, 0.2), background_normal='',
+        close_btn = Button(text="保存并关闭", size_hint=(1, 0.15), background_normal='',
                            background_color=(0.4, 0.4, 0.4, 1),
                            font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
         close_btn.bind(on_press=self.dismiss)
@@ -139,10 +335,16 @@ class SettingsPopup(ModalView):
 
         # 初始化显示当前状态
         self.switch_mode(self.app.game_mode)
+        self.switch_sample_mode(self.app.sample_mode)
+        self.switch_power(self.app.power_saving)
 
-    def update_rect(self, instance, value):
-        self.rect.pos = instance.pos
-        self.rect.size = instance.size
+    def open(self, *args):
+        # 设置可能在别处被改过，打开前同步一次
+        self.switch_mode(self.app.game_mode)
+        self.switch_sample_mode(self.app.sample_mode)
+        self.switch_power(self.app.power_saving)
+        self.wakeups_lbl.text = f"主循环约 {self.app.power.wakeups_per_minute():.0f} 次/分钟 (上次查看以来)"
+        super().open(*args)
 
     def switch_mode(self, mode):
         """切换模式，更新UI"""
@@ -150,28 +352,44 @@ class SettingsPopup(ModalView):
 
         # 更新顶部按钮颜色状态
         if mode == 'time':
-            self.btn_mode_time.bg_color_value = (0.2, 0.8, 0.2, 1)  # 选中绿
-            self.btn_mode_score.bg_color_value = (0.3, 0.3, 0.4, 1)  # 未选灰
+            self.btn_mode_time.set_bg_color((0.2, 0.8, 0.2, 1))  # 选中绿
+            self.btn_mode_score.set_bg_color((0.3, 0.3, 0.4, 1))  # 未选灰
             self.desc_lbl.text = "在规定时间内，尽可能猜对更多题目"
             options = [30, 60, 90, 120]
             unit = "秒"
             current_val = self.app.target_value if self.app.target_value > 20 else 60
         else:
-            self.btn_mode_time.bg_color_value = (0.3, 0.3, 0.4, 1)
-            self.btn_mode_score.bg_color_value = (0.2, 0.8, 0.2, 1)
+            self.btn_mode_time.set_bg_color((0.3, 0.3, 0.4, 1))
+            self.btn_mode_score.set_bg_color((0.2, 0.8, 0.2, 1))
             self.desc_lbl.text = "猜对规定数量的题目，看谁用时最短"
             options = [5, 10, 15, 20]
             unit = "题"
             current_val = self.app.target_value if self.app.target_value <= 20 else 10
 
+        # 界面上选中的就是实际生效的目标值
+        self.app.target_value = current_val
+        self.options = options
+        self.unit = unit
+
         # 刷新下方选项按钮
-        self.options_grid.clear_widgets()
-        for opt in options:
+        for opt, btn in zip(options, self.option_btns):
             is_selected = (opt == current_val)
             color = (0.9, 0.6, 0.2, 1) if is_selected else (0.3, 0.6, 1, 1)
-            btn = RoundedButton(text=f"{opt}{unit}", bg_color=color, font_name=CHINESE_FONT)
-            btn.bind(on_press=lambda x, val=opt: self.set_target(val, unit))
-            self.options_grid.add_widget(btn)
+            btn.set_bg_color(color)
+            text = f"{opt}{unit}"
+            if btn.text != text:
+                btn.text = text
+
+    def switch_sample_mode(self, mode):
+        """出题方式：随机 (不重复直到出完)、均衡 (按难度加权)、只出难题"""
+        self.app.sample_mode = mode
+        for m, btn in self.sample_btns.items():
+            btn.set_bg_color((0.2, 0.8, 0.2, 1) if m == mode else (0.3, 0.3, 0.4, 1))
+
+    def switch_power(self, enabled):
+        """省电模式：静止菜单限帧、降低重力感应采样率"""
+        self.app.power_saving = enabled
+        self.btn_power.set_bg_color((0.2, 0.8, 0.2, 1) if enabled else (0.3, 0.3, 0.4, 1))
 
     def set_target(self, value, unit):
         self.app.target_value = value
@@ -179,31 +397,172 @@ class SettingsPopup(ModalView):
         self.switch_mode(self.app.game_mode)
 
 
+class CategoryButton(Button):
+    """题库列表的行视图，由 RecycleView 复用；点击时把类别名交给 handler"""
+    category = StringProperty('')
+    handler = ObjectProperty(None, allownone=True)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.font_size = 28
+        self.background_normal = ''
+
+    def on_press(self):
+        if self.handler: self.handler(self.category)
+
+
+class HistoryPopup(PopupPanel):
+    """历史记录弹窗：统计数据来自增量维护的汇总，打开时不扫描整个日志"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.app = App.get_running_app()
+        self.orientation = 'vertical'
+        self.padding = 20
+        self.spacing = 15
+
+        self.add_widget(Label(text="历史记录", font_size=32, bold=True, size_hint=(1, 0.15),
+                              font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto'))
+        from kivy.uix.scrollview import ScrollView
+        scroll = ScrollView(size_hint=(1, 0.65))
+        self.body_lbl = Label(font_size=20, halign='left', valign='top', size_hint_y=None,
+                              font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
+        self.body_lbl.bind(width=lambda i, w: setattr(i, 'text_size', (w, None)),
+                           texture_size=lambda i, s: setattr(i, 'height', s[1]))
+        scroll.add_widget(self.body_lbl)
+        self.add_widget(scroll)
+
+        close_btn = Button(text="关闭", size_hint=(1, 0.2), background_normal='',
+                           background_color=(0.4, 0.4, 0.4, 1),
+                           font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
+        close_btn.bind(on_press=self.dismiss)
+        self.add_widget(close_btn)
+
+    def open(self, *args):
+        text = self.summary_text()
+        # 类别名可能来自自定义题库，子集字体不一定有这些字
+        self.body_lbl.font_name = font_for(text)
+        self.body_lbl.text = text
+        super().open(*args)
+
+    def summary_text(self):
+        history = self.app.get_history()
+        units = {'time': ("倒计时", "秒"), 'score': ("竞速", "题")}
+        lines = [f"总局数: {history.summary['rounds']}"]
+        for mode, (name, _) in units.items():
+            count = history.summary['modes'].get(mode, {}).get('count', 0)
+            if count:
+                lines.append(f"{name}模式平均得分: {history.average_score(mode):.1f} ({count} 局)")
+
+        best = history.best()
+        if best:
+            lines.append("\n最佳成绩:")
+            for mode, category, target, value in sorted(best):
+                name, unit = units.get(mode, (mode, ""))
+                result = f"{value} 题" if mode == 'time' else f"{value:.1f} 秒"
+                lines.append(f"  {category}  {name}{target}{unit}: {result}")
+
+        recent = history.recent(10)
+        if recent:
+            lines.append("\n最近对局:")
+            for r in recent:
+                name, unit = units.get(r['mode'], (r['mode'], ""))
+                when = time.strftime('%m-%d %H:%M', time.localtime(r['t']))
+                lines.append(f"  {when}  {r['category']}  {name}{r['target']}{unit}  "
+                             f"得分 {r['score']}  用时 {r['time']:.1f} 秒")
+        return "\n".join(lines)
+
+
+class CachePopup(PopupPanel):
+    """清空缓存弹窗：显示缓存目录占用，确认后删除全部派生数据"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.app = App.get_running_app()
+        self.orientation = 'vertical'
+        self.padding = 20
+        self.spacing = 15
+
+        self.add_widget(Label(text="清空缓存", font_size=32, bold=True, size_hint=(1, 0.2),
+                              font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto'))
+        self.usage_lbl = Label(text="", font_size=22, halign='center', size_hint=(1, 0.4),
+                               font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
+        self.add_widget(self.usage_lbl)
+
+        btn_layout = BoxLayout(spacing=15, size_hint=(1, 0.25))
+        clear_btn = RoundedButton(text="清空", bg_color=(0.8, 0.3, 0.3, 1),
+                                  font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
+        clear_btn.bind(on_press=self.clear)
+        close_btn = RoundedButton(text="关闭", bg_color=(0.4, 0.4, 0.4, 1),
+                                  font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
+        close_btn.bind(on_press=self.dismiss)
+        btn_layout.add_widget(clear_btn)
+        btn_layout.add_widget(close_btn)
+        self.add_widget(btn_layout)
+
+    def open(self, *args):
+        self.show_usage()
+        super().open(*args)
+
+    def show_usage(self, note=""):
+        size, count = self.app.get_cache().usage()
+        self.usage_lbl.text = f"{note}当前缓存: {size / 1024 / 1024:.2f} MB ({count} 个文件)\n(题库编译结果、排版数据，可随时重新生成)"
+
+    def clear(self, *args):
+        freed = self.app.clear_cache()
+        self.show_usage(f"已释放 {freed / 1024 / 1024:.2f} MB\n")
+
+
 # ==================== 1. 欢迎界面 ====================
-class WelcomeScreen(Screen):
+class WelcomeScreen(BgScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        with self.canvas.before:
-            Color(0.15, 0.15, 0.18, 1)
-            self.rect = Rectangle(size=self.size, pos=self.pos)
-        self.bind(size=self._update_rect, pos=self._update_rect)
         self.add_widget(
             Label(text='欢迎来到"你猜我划"！', font_size=50, font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto'))
-        Clock.schedule_once(lambda dt: setattr(self.manager, 'current', 'main_menu'), 1.5)
-
-    def _update_rect(self, instance, value):
-        self.rect.pos = instance.pos
-        self.rect.size = instance.size
+        self.progress = ProgressBar(max=1, value=0, size_hint=(0.6, None), height=20, pos_hint={'center_x': 0.5, 'y': 0.2})
+        self.add_widget(self.progress)
+
+        # 显示欢迎界面的同时在后台加载字体、音效和题库，都好了 (且显示够最短时间) 就进入主菜单
+        self.shown_at = time.monotonic()
+        self.loaded = False
+        Clock.schedule_once(lambda dt: self.start_preload())
+        Clock.schedule_once(lambda dt: self.leave(), SPLASH_MAX)
+
+    def start_preload(self):
+        app = App.get_running_app()
+        app.get_cache()  # 在主线程上先建好，后台任务里直接用
+        tasks = [('sounds', lambda: [read_file(f'audio/{name}.wav') for name in SOUNDS], lambda r: app.get_sfx()),
+                 ('word bank', app.load_banks, None)]
+        if CHINESE_FONT:
+            tasks.append(('font', lambda: read_file(CHINESE_FONT), lambda r: self.warm_font()))
+        Preloader(tasks, self.on_preload_progress, self.on_preload_done).start()
+
+    def warm_font(self):
+        # 渲染一次标题，字体文件在 SDL_ttf 里打开并缓存好，主菜单不用再等
+        label = CoreLabel(text='你猜我划聚会破冰神器', font_size=72, font_name=CHINESE_FONT)
+        label.refresh()
+
+    def on_preload_progress(self, done, total):
+        self.progress.value = done / total
+
+    def on_preload_done(self):
+        self.loaded = True
+        self.leave()
+
+    def leave(self):
+        if self.manager.current != 'welcome':
+            return
+        wait = SPLASH_MIN - (time.monotonic() - self.shown_at)
+        if wait > 0:
+            Clock.schedule_once(lambda dt: self.leave(), wait)
+        else:
+            self.manager.current = 'main_menu'
 
 
 # ==================== 2. 主菜单界面 ====================
-class MainMenuScreen(Screen):
+class MainMenuScreen(BgScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        with self.canvas.before:
-            Color(0.15, 0.15, 0.18, 1)
-            self.rect = Rectangle(size=self.size, pos=self.pos)
-        self.bind(size=self._update_rect, pos=self._update_rect)
 
         main_layout = BoxLayout(orientation='vertical', padding=[50, 60, 50, 60], spacing=20)
 
@@ -227,19 +586,16 @@ class MainMenuScreen(Screen):
         main_layout.add_widget(btn_grid)
         self.add_widget(main_layout)
 
-    def _update_rect(self, instance, value):
-        self.rect.pos = instance.pos
-        self.rect.size = instance.size
-
 
 # ==================== 3. 题库选择界面 (新增随机挑战) ====================
-class QuestionBankScreen(Screen):
+class QuestionBankScreen(BgScreen):
  def __init__(self, **kwargs):
   super().__init__(**kwargs)
-  with self.canvas.before:
-   Color(1, 1, 1, 1)
-   self.rect = Rectangle(size=self.size, pos=self.pos)
-  self.bind(size=self._update_rect, pos=self._update_rect)
+  # 这几个控件只有题库界面用到，导入较慢 (TextInput 尤其)，延迟到第一次进入时
+  from kivy.uix.recycleview import RecycleView
+  from kivy.uix.recyclegridlayout import RecycleGridLayout
+  from kivy.uix.textinput import TextInput
+  self.bg_color = (1, 1, 1, 1)
 
   main_layout = BoxLayout(orientation='vertical', spacing=20, padding=30)
 
@@ -247,11 +603,30 @@ class QuestionBankScreen(Screen):
   main_layout.add_widget(Label(text='请选择题库类别', font_size=36, color=(0, 0, 0, 1), size_hint=(1, 0.1),
                                font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto'))
 
-  # 题目网格
-  self.grid = GridLayout(cols=2, spacing=20, padding=10, size_hint=(1, 0.8))
-  self.quiz_data = self.load_data()
-  self.create_buttons()
+  # 搜索框：类别名、词条、拼音首字母
+  # 输入的字可能不在子集字体里，直接用回退字体
+  self.search_input = TextInput(hint_text='搜索类别或词条 (支持拼音首字母)', multiline=False, font_size=24,
+                                size_hint=(1, 0.08), font_name=FALLBACK_FONT or CHINESE_FONT or 'Roboto')
+  self.search_trigger = Clock.create_trigger(self.update_rows, 0.15)  # 连续输入时合并刷新
+  self.search_input.bind(text=lambda i, v: self.search_trigger())
+  main_layout.add_widget(self.search_input)
 
+  # 导入进度 / 题库问题提示
+  self.status_lbl = Label(text='', font_size=18, color=(0.5, 0.5, 0.5, 1), size_hint=(1, 0.05),
+                          font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
+  main_layout.add_widget(self.status_lbl)
+
+  # 类别列表：RecycleView 只为可见的行创建按钮，类别再多也能滚动
+  self.bank = self.load_data()
+  self.table = None  # 去重词条表，后台线程建好之前按类别从题库解码
+  self.index = CategoryIndex(self.bank.categories)
+  self.grid = RecycleView(size_hint=(1, 0.67))
+  layout = RecycleGridLayout(cols=2, spacing=20, padding=10, default_size=(None, 90),
+                             default_size_hint=(1, None), size_hint_y=None)
+  layout.bind(minimum_height=layout.setter('height'))
+  self.grid.add_widget(layout)
+  self.grid.viewclass = CategoryButton
+  self.update_rows()
   main_layout.add_widget(self.grid)
 
   # 返回按钮
@@ -262,91 +637,118 @@ class QuestionBankScreen(Screen):
 
   self.add_widget(main_layout)
 
- def _update_rect(self, instance, value):
-  self.rect.pos = instance.pos
-  self.rect.size = instance.size
+  # 词条索引和词条表在后台线程里建，建好之前只能按类别名搜索
+  threading.Thread(target=self.index_words, args=(self.bank, self.index), daemon=True).start()
 
  def load_data(self):
-  try:
-   if os.path.exists('words.json'):
-    with open('words.json', 'r', encoding='utf-8') as f:
-     return json.load(f)
-  except:
-   pass
-  # 默认备用数据
-  return {"默认题库": ["苹果", "香蕉", "西瓜"]}
-
- def create_buttons(self):
-     self.grid.clear_widgets()
-
-     # === 1. 🎲 随机大挑战按钮 (保持不变) ===
-     btn_random = Button(text="随机大挑战", font_size=28, color=(1, 1, 1, 1),
-                         background_normal='', background_color=(0.6, 0.2, 0.8, 1),
-                         font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
-     btn_random.bind(on_press=self.start_random_challenge)
-     self.grid.add_widget(btn_random)
-
-     # === 2. 普通分类按钮 (这里是修复的重点) ===
-     for cat in self.quiz_data.keys():
-         btn = Button(text=cat, font_size=28, color=(0, 0, 0, 1),
-                      background_normal='', background_color=(0.9, 0.9, 0.9, 1),
-                      font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
-
-         # 🔴 修复前 (报错的原因):
-         # btn.bind(on_press=lambda x, c=cat: self.select_category(c))
-
-         # 🟢 修复后 (正确写法):
-         # 我们不仅要传类别名 c，还要把对应的题目列表 q 也传进去！
-         questions_list = self.quiz_data[cat]
-         btn.bind(on_press=lambda x, c=cat, q=questions_list: self.select_category(c, q))
+  # 题库通常已在欢迎界面预加载 (能 mmap 的部分)；没有题库包的 JSON 交给后台线程流式解析
+  app = App.get_running_app()
+  banks, pending = app.load_banks()
+  self.importing = bool(pending)  # 导入完成前题库不全，随机大挑战先不显示
+  if pending:
+   self.set_status('正在导入题库…')
+   BankImporter(pending, self.on_import_progress, self.on_import_done, app.get_cache()).start()
+  elif not banks:
+   banks = [JsonWordBank(DEFAULT_BANK)]
+  return MergedWordBank(banks)
+
+ def set_status(self, text):
+  # 文件名、类别名都是用户起的，可能有子集字体里没有的字
+  self.status_lbl.font_name = font_for(text)
+  self.status_lbl.text = text
+
+ def on_import_progress(self, name, fraction):
+  self.set_status(f'正在导入 {name}  {int(fraction * 100)}%')
+
+ def on_import_done(self, results):
+  banks = list(self.bank.banks)
+  problems = []
+  for name, data, file_problems in results:
+   if data:
+    banks.append(JsonWordBank(data))
+   elif not file_problems:
+    file_problems = ['没有可用的词条']
+   problems.extend(f'{name}: {p}' for p in file_problems)
+  if not banks:
+   banks.append(JsonWordBank(DEFAULT_BANK))
+  for p in problems:
+   print(f"警告: {p}")
+  # 提示栏只放得下一条，完整列表在日志里
+  self.set_status((problems[0] + (f' 等 {len(problems)} 个问题' if len(problems) > 1 else '')) if problems else '')
+  self.bank = MergedWordBank(banks)
+  self.importing = False
+  self.table = None  # 题库变了，词条表作废重建
+  App.get_running_app().banks = (banks, [])
+  self.index = CategoryIndex(self.bank.categories)
+  self.update_rows()
+  threading.Thread(target=self.index_words, args=(self.bank, self.index), daemon=True).start()
+
+ def index_words(self, bank, index):
+  for cat in bank.categories:
+   index.add_words(cat, bank.get(cat))
+  table = WordTable(bank)
+  if self.bank is bank:  # 期间题库没有被替换
+   self.table = table
+  # 搜索中的结果可能因为词条索引变多，回主线程刷新一次
+  Clock.schedule_once(lambda dt: self.search_input.text and self.update_rows())
+
+ def update_rows(self, *args):
+  # === 1. 🎲 随机大挑战 (始终排第一；导入中或题库为空时不显示) ===
+  rows = []
+  if not self.importing and self.bank.categories:
+   rows.append({'text': "随机大挑战", 'category': '', 'handler': self.on_row_press, 'color': (1, 1, 1, 1),
+                'background_color': (0.6, 0.2, 0.8, 1), 'font_name': CHINESE_FONT if CHINESE_FONT else 'Roboto'})
+  # === 2. 普通分类 (按搜索结果) ===
+  for cat in self.index.search(self.search_input.text):
+   rows.append({'text': cat, 'category': cat, 'handler': self.on_row_press, 'color': (0, 0, 0, 1),
+                'background_color': (0.9, 0.9, 0.9, 1), 'font_name': font_for(cat)})
+  self.grid.data = rows
+
+ def on_row_press(self, category):
+  if not category:
+   self.start_random_challenge(None)
+  else:
+   # 词条表建好后直接传下标视图，否则在点击时才从题库包解码
+   table = self.table
+   self.select_category(category, table.view(category) if table else self.bank.get(category))
+
+ def get_table(self):
+  if self.table is None:
+   # 后台线程还没建完，只好在这里建 (之后一直复用，直到题库变化)
+   with profiler.phase('build word table'):
+    self.table = WordTable(self.bank)
+  return self.table
 
-         self.grid.add_widget(btn)
  def start_random_challenge(self, instance):
-  """处理随机挑战逻辑"""
-  all_questions = []
-  # 1. 遍历所有分类，把题目加到一个大列表里
-  for category_list in self.quiz_data.values():
-   all_questions.extend(category_list)
-
-  # 2. 去重 (可选，防止有些词在不同分类重复出现)
-  all_questions = list(set(all_questions))
-
-  # 3. 开始游戏
-  self.select_category("随机大挑战", all_questions)
+  """随机大挑战：所有类别去重后的词条 (顺序稳定，出题记录按下标保存，跨进程必须一致)"""
+  self.select_category("随机大挑战", self.get_table().pool)
 
  def select_category(self, category_name, questions):
   game_screen = App.get_running_app().root.get_screen('game')
-  game_screen.set_category(category_name, questions)
+  if not game_screen.set_category(category_name, questions):
+   self.set_status(f'{category_name}: 没有可用的词条')
+   return
   App.get_running_app().root.current = 'game'
 
 
 # ==================== 4. "我的"界面 ====================
-class MyPageScreen(Screen):
+class MyPageScreen(BgScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        with self.canvas.before:
-            Color(0.15, 0.15, 0.18, 1)
-            self.rect = Rectangle(size=self.size, pos=self.pos)
-        self.bind(size=self._update_rect, pos=self._update_rect)
 
         main_layout = BoxLayout(orientation='vertical', spacing=20, padding=30)
 
-        user_card = BoxLayout(orientation='horizontal', size_hint=(1, 0.25), padding=20, spacing=20)
-        with user_card.canvas.before:
-            Color(0.2, 0.5, 0.9, 0.8)
-            self.user_rect = RoundedRectangle(size=user_card.size, pos=user_card.pos, radius=[15, ])
-        user_card.bind(
-            pos=lambda i, v: setattr(self.user_rect, 'pos', i.pos) or setattr(self.user_rect, 'size', i.size),
-            size=lambda i, v: setattr(self.user_rect, 'pos', i.pos) or setattr(self.user_rect, 'size', i.size))
+        user_card = RoundedBox(orientation='horizontal', size_hint=(1, 0.25), padding=20, spacing=20,
+                               bg_color=(0.2, 0.5, 0.9, 0.8), radius=[15])
 
         user_card.add_widget(Label(text="头像", font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto'))
         user_card.add_widget(
             Label(text="未登录用户", font_size=28, halign='left', font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto'))
 
         menu_layout = BoxLayout(orientation='vertical', spacing=15, size_hint=(1, 0.6))
-        menu_layout.add_widget(MenuItem("历史记录", lambda: print("历史")))
-        menu_layout.add_widget(MenuItem("清空缓存", lambda: print("清空")))
-        menu_layout.add_widget(MenuItem("游戏设置", lambda: SettingsPopup().open()))
+        menu_layout.add_widget(MenuItem("历史记录", self.open_history))
+        menu_layout.add_widget(MenuItem("清空缓存", self.open_cache))
+        menu_layout.add_widget(MenuItem("游戏设置", lambda: SettingsPopup.get().open()))
         menu_layout.add_widget(Label())
 
         back_btn = Button(text="返回主菜单", size_hint=(1, 0.15), background_color=(0.3, 0.3, 0.3, 1),
@@ -357,10 +759,18 @@ class MyPageScreen(Screen):
         main_layout.add_widget(menu_layout)
         main_layout.add_widget(back_btn)
         self.add_widget(main_layout)
+        self.history_popup = None
+        self.cache_popup = None
 
-    def _update_rect(self, instance, value):
-        self.rect.pos = instance.pos
-        self.rect.size = instance.size
+    def open_history(self):
+        if self.history_popup is None:
+            self.history_popup = HistoryPopup()
+        self.history_popup.open()
+
+    def open_cache(self):
+        if self.cache_popup is None:
+            self.cache_popup = CachePopup()
+        self.cache_popup.open()
 
 
 # ==================== 5. 游戏界面 (含3-2-1倒计时) ====================
@@ -368,20 +778,41 @@ class GameScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.questions = []
+        self.category = ''
         self.score = 0
         self.timer_val = 0
-        self.timer_event = None
+        self.play_start = 0
+        # 倒计时、计时、感应轮询、冷却都由同一个单调时钟调度
+        self.clock = GameClock(game_time_source())
+        self.timer_event = None  # 计时显示刷新
+        self.deadline_event = None  # 倒计时模式的结束时刻
         self.sensor_event = None
+        self.sensor_on = False
         self.countdown_event = None  # 倒计时事件
-        self.is_cooldown = False
+        self.tilt = TiltDetector()
         self.app = App.get_running_app()
-
-        try:
-            self.snd_correct = SoundLoader.load('audio/correct.wav')
-            self.snd_wrong = SoundLoader.load('audio/wrong.wav')
-        except:
-            self.snd_correct = None
-            self.snd_wrong = None
+        self.decks = DeckStore(os.path.join(self.app.user_data_dir, 'decks'))
+        self.deck = None
+        self.deck_mode = 'random'
+        self.weighted = {}  # (类别, 出题方式, 词条数) -> WeightedDeck，本次运行内复用
+        self.stats = WordStats(os.path.join(self.app.user_data_dir, 'word_stats.bin'))
+        self.current_index = None
+        self.shown_at = 0
+        self.current_word = None
+        self.ring = deque()  # 预渲染好的后续题目 (下标, 题目, 纹理)
+        self.metrics = self.app.get_layout_metrics()
+        self.prefetch_event = None
+        self.fit_box = None  # 题目标签的尺寸，第一次布局之后才知道
+        self.fits = None  # 当前尺寸下的 {词条: 字号}
+        self.warm_iter = None
+        self.warm_event = None
+        self.box_trigger = Clock.create_trigger(self.update_box)  # 布局稳定后再取尺寸
+
+        self.sfx = self.app.get_sfx()  # 通常已在欢迎界面预加载
+        self.over_msg = ''
+        self.scoreboard = self.app.get_scoreboard()
+        if self.scoreboard:
+            self.scoreboard.on_standings = self.on_standings
 
         main_layout = BoxLayout(orientation='vertical', spacing=10, padding=30)
 
@@ -396,37 +827,20 @@ class GameScreen(Screen):
         )
         main_layout.add_widget(self.timer_lbl)
 
-        self.q_container = BoxLayout(orientation='vertical', size_hint=(1, 0.6))
-        with self.q_container.canvas.before:
-            Color(0, 0, 0, 1)
-            self.border = Line(width=2)
-        self.q_container.bind(pos=self._update_border, size=self._update_border)
+        self.q_container = BorderBox(orientation='vertical', size_hint=(1, 0.6))
 
-        self.q_lbl = Label(text="准备...", font_size=60, color=(0, 0, 0, 1),
-                           font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
+        self.q_lbl = QuestionLabel(text="准备...", font_size=QUESTION_FONT_SIZE, color=(0, 0, 0, 1),
+                                   font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
+        self.q_lbl.bind(size=self.box_trigger)
         self.q_container.add_widget(self.q_lbl)
         main_layout.add_widget(self.q_container)
 
         btn_layout = BoxLayout(spacing=40, size_hint=(1, 0.3))
 
-        self.wrong_btn = Button(text="跳过", font_size=36, color=(0, 0, 0, 1), background_color=(0, 0, 0, 0),
-                                font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
-        with self.wrong_btn.canvas.before:
-            Color(0, 0, 0, 1)
-            self.w_border = Line(rounded_rectangle=(0, 0, 1, 1, 10), width=1.5)
-        self.wrong_btn.bind(
-            pos=lambda i, v: setattr(self.w_border, 'rounded_rectangle', (i.x, i.y, i.width, i.height, 10)),
-            size=lambda i, v: setattr(self.w_border, 'rounded_rectangle', (i.x, i.y, i.width, i.height, 10)))
+        self.wrong_btn = OutlineButton(text="跳过", font_size=36, font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
         self.wrong_btn.bind(on_press=self.handle_wrong)
 
-        self.right_btn = Button(text="正确", font_size=36, color=(0, 0, 0, 1), background_color=(0, 0, 0, 0),
-                                font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
-        with self.right_btn.canvas.before:
-            Color(0, 0, 0, 1)
-            self.r_border = Line(rounded_rectangle=(0, 0, 1, 1, 10), width=1.5)
-        self.right_btn.bind(
-            pos=lambda i, v: setattr(self.r_border, 'rounded_rectangle', (i.x, i.y, i.width, i.height, 10)),
-            size=lambda i, v: setattr(self.r_border, 'rounded_rectangle', (i.x, i.y, i.width, i.height, 10)))
+        self.right_btn = OutlineButton(text="正确", font_size=36, font_name=CHINESE_FONT if CHINESE_FONT else 'Roboto')
         self.right_btn.bind(on_press=self.handle_correct)
 
         btn_layout.add_widget(self.wrong_btn)
@@ -434,123 +848,291 @@ class GameScreen(Screen):
         main_layout.add_widget(btn_layout)
         self.add_widget(main_layout)
 
-    def _update_border(self, instance, value):
-        self.border.rectangle = (instance.x, instance.y, instance.width, instance.height)
-
     def on_enter(self):
         # === 核心修改：进入时不直接开始，而是进入“准备阶段” ===
-        self.q_lbl.text = "请将手机\n放额头"
-        self.q_lbl.font_size = 50
+        self.q_lbl.show_text("请将手机\n放额头", 50)
         self.timer_lbl.text = "准备中..."
 
         # 1. 禁用所有操作
         self.wrong_btn.disabled = True
         self.right_btn.disabled = True
-        self.stop_timer()
         self.stop_sensor()
+        self.clock.stop()  # 同时清掉上一局残留的计时、冷却、跳转
 
         # 2. 启动 3-2-1 倒计时
+        self.clock.phase = 'countdown'
         self.countdown_val = 3
         # 1秒后开始倒数
-        if self.countdown_event: self.countdown_event.cancel()
-        self.countdown_event = Clock.schedule_interval(self.update_countdown, 1)
+        self.countdown_event = self.clock.every(1, self.update_countdown)
 
     def on_leave(self):
         self.stop_sensor()
-        self.stop_timer()
-        # 离开时也要把倒计时关了
-        if self.countdown_event: self.countdown_event.cancel()
+        # 离开时也要把倒计时、计时全部关了
+        self.clock.stop()
+        self.clear_ring()
+        self.save_progress()
 
-    def update_countdown(self, dt):
+    def update_countdown(self, now):
         """处理 3-2-1 逻辑"""
         if self.countdown_val > 0:
-            self.q_lbl.text = str(self.countdown_val)
-            self.q_lbl.font_size = 150  # 字体超大，醒目
+            self.q_lbl.show_text(str(self.countdown_val), 150)  # 字体超大，醒目
             self.countdown_val -= 1
         else:
-            self.q_lbl.text = "GO!"
-            self.q_lbl.font_size = 100
+            self.q_lbl.show_text("GO!", 100)
             # 停止倒计时计时器
-            if self.countdown_event: self.countdown_event.cancel()
+            self.countdown_event.cancel()
             # 0.5秒后正式开始游戏
-            Clock.schedule_once(self.start_game_logic, 0.5)
+            self.clock.after(0.5, self.start_game_logic)
 
-    def start_game_logic(self, dt):
+    def start_game_logic(self, now):
         """正式开始游戏的逻辑"""
-        self.q_lbl.font_size = 60
+        if not self.questions:
+            # 正常流程里 set_category 已经拦下空题库，这里兜底，不让抽题时抛 IndexError
+            print("警告: 没有可用的词条，返回题库界面")
+            self.manager.current = 'question_bank'
+            return
         self.wrong_btn.disabled = False
         self.right_btn.disabled = False
 
         # 初始化游戏数据
         self.app = App.get_running_app()
+        self.clock.phase = 'play'
+        self.play_start = now
         if self.app.game_mode == 'time':
-            self.timer_val = self.app.target_value
-        else:
-            self.timer_val = 0
+            # 结束时刻直接挂在时钟上，不靠逐帧扣减
+            self.deadline_event = self.clock.at(now + self.app.target_value, lambda t: self.game_over())
 
-        self.update_display_text()
+        if self.scoreboard:
+            self.scoreboard.send('round')
+        self.app.power.set_quiet(False)
         self.show_question()
         self.start_sensor()  # 开启重力感应
-
-        # 开启游戏主循环
-        if self.timer_event: self.timer_event.cancel()
-        self.timer_event = Clock.schedule_interval(self.update_time, 0.1)
+        self.update_time(now)
 
     def set_category(self, name, questions):
-        self.questions = questions.copy()
-        random.shuffle(self.questions)
+        """换题库类别；没有词条时拒绝并返回 False，保持原来的类别"""
+        if not questions:
+            print(f"警告: {name} 没有可用的词条")
+            return False
+        # 不复制也不洗牌，随机模式由 DeckSampler 跨局记录已出过的题
+        self.clear_ring()  # 上一个牌堆里预渲染的题先放回去
+        self.questions = questions
+        self.category = name
+        self.deck_mode = self.app.sample_mode
+        self.deck = self.get_deck(name, questions, self.deck_mode)
         self.score = 0
-        self.current_index = 0
+        # 倒计时期间就开始预渲染前几题，并在空闲时算好这个类别所有词条的字号
+        self.schedule_prefetch()
+        self.start_warm()
         # 这里不需要在这里开启timer了，移到 on_enter 处理
+        return True
+
+    def get_deck(self, name, questions, mode):
+        if mode == 'random':
+            return self.decks.get(name, len(questions))
+        key = (name, mode, len(questions))
+        deck = self.weighted.get(key)
+        if deck is None:
+            # 只在第一次选这个类别时算一遍权重，之后每答一题只改一个词条的权重
+            with profiler.phase('build weighted deck'):
+                deck = self.weighted[key] = WeightedDeck([self.stats.weight(w, mode) for w in questions])
+        return deck
+
+    def draw_index(self):
+        try:
+            return self.deck.draw()
+        except IndexError:
+            if self.deck_mode != 'hard':
+                raise
+            # 还没有 (或已经没有) 难题记录，改为均衡出题
+            self.weighted.pop((self.category, 'hard', len(self.questions)), None)
+            self.deck_mode = 'balanced'
+            self.deck = self.get_deck(self.category, self.questions, 'balanced')
+            return self.deck.draw()
+
+    def record_outcome(self, correct):
+        """记下当前题目的结果 (跳过或答对用时)，加权出题时同步更新它的权重"""
+        if self.current_index is None:
+            return
+        word = self.current_word
+        self.stats.record(word, correct, self.clock.now() - self.shown_at)
+        if self.deck_mode != 'random':
+            self.deck.set_weight(self.current_index, self.stats.weight(word, self.deck_mode))
+        self.current_index = None
+
+    def save_progress(self):
+        self.decks.save()
+        try:
+            self.stats.save()
+        except OSError as e:
+            print(f"警告: 保存答题统计失败 ({e})")
 
     def show_question(self):
-        if self.current_index >= len(self.questions): random.shuffle(self.questions); self.current_index = 0
-        self.q_lbl.text = self.questions[self.current_index]
-
-    def update_time(self, dt):
+        if not self.ring:
+            self.prefetch_one()  # 预渲染没跟上，只能当场渲染
+        self.current_index, self.current_word, texture = self.ring.popleft()
+        self.shown_at = self.clock.now()
+        self.q_lbl.show_texture(texture)
+        self.schedule_prefetch()
+
+    def render_question(self, word, font_size):
+        options = {}
+        base = self.metrics.get(word)
+        if self.fit_box and base and base[0] * font_size / QUESTION_FONT_SIZE > self.fit_box[0] * FIT_MARGIN:
+            # 最小字号也放不下，只能折行
+            options = {'text_size': (self.fit_box[0] * FIT_MARGIN, None), 'halign': 'center'}
+        label = CoreLabel(text=word, font_size=font_size, color=(0, 0, 0, 1), font_name=font_for(word), **options)
+        label.refresh()
+        return label.texture
+
+    def fit_font(self, word):
+        """word 在当前题目标签里能用的最大字号 (不超过 QUESTION_FONT_SIZE)，算过的直接查表"""
+        font_size = self.fits.get(word)
+        if font_size is None:
+            base = self.metrics.get(word)
+            if base is None:
+                # 只排版不光栅化，拿到最大字号下的尺寸；字号变化时尺寸近似按比例缩放
+                base = CoreLabel(text=word, font_size=QUESTION_FONT_SIZE, font_name=font_for(word)).render()
+                self.metrics.set(word, base)
+            w, h = self.fit_box
+            scale = min(1, w * FIT_MARGIN / max(base[0], 1), h * FIT_MARGIN / max(base[1], 1))
+            font_size = max(MIN_QUESTION_FONT_SIZE, int(QUESTION_FONT_SIZE * scale))
+            self.metrics.set_fit(self.fits, word, font_size)
+        return font_size
+
+    def update_box(self, dt):
+        box = (int(self.q_lbl.width), int(self.q_lbl.height))
+        if box == self.fit_box or min(box) < MIN_QUESTION_FONT_SIZE:
+            return  # 没变，或者是布局过程中的临时尺寸
+        self.fit_box = box
+        self.fits = self.metrics.fit_table(box)
+        warming = self.warm_iter is not None
+        if self.ring:
+            # 预渲染的题是按旧尺寸排的 (第一次布局、横竖屏切换)，放回牌堆重新渲染
+            self.clear_ring()
+            self.schedule_prefetch()
+        if warming:
+            self.start_warm()
+
+    def start_warm(self):
+        if self.warm_event:
+            self.warm_event.cancel()
+        self.warm_iter = iter(self.questions)
+        self.warm_event = Clock.schedule_once(self.warm, 0)
+
+    def warm(self, dt):
+        """在空闲帧里分批算好各词条的字号，出题时只查表
+
+        排版用的 SDL_ttf 字体对象不能跨线程共用，所以不放后台线程，而是每帧只占用 WARM_BUDGET。
+        """
+        self.warm_event = None
+        if self.fits is None:
+            return  # 等第一次布局，update_box 会重新开始
+        deadline = time.perf_counter() + WARM_BUDGET
+        for word in self.warm_iter:
+            self.fit_font(word)
+            if time.perf_counter() > deadline:
+                self.warm_event = Clock.schedule_once(self.warm, 0)
+                return
+        self.warm_iter = None
+
+    def prefetch_one(self):
+        index = self.draw_index()
+        word = self.questions[index]
+        # 还没布局时先按最大字号渲染，布局后 update_box 会重新渲染
+        font_size = self.fit_font(word) if self.fits is not None else QUESTION_FONT_SIZE
+        texture = self.render_question(word, font_size)
+        self.ring.append((index, word, texture))
+
+    def schedule_prefetch(self):
+        if not self.prefetch_event and len(self.ring) < PREFETCH_DEPTH:
+            self.prefetch_event = Clock.schedule_once(self.prefetch, 0)
+
+    def prefetch(self, dt):
+        """每帧只渲染一题，避免集中渲染造成卡顿"""
+        self.prefetch_event = None
+        if self.deck is None or not self.questions:
+            return
+        self.prefetch_one()
+        self.schedule_prefetch()
+
+    def clear_ring(self):
+        """丢弃预渲染纹理 (释放显存)，没展示过的题放回牌堆；没算完的字号也不再算"""
+        if self.prefetch_event:
+            self.prefetch_event.cancel()
+            self.prefetch_event = None
+        if self.warm_event:
+            self.warm_event.cancel()
+            self.warm_event = None
+        self.warm_iter = None
+        while self.ring:
+            index, _, _ = self.ring.pop()
+            self.deck.put_back(index)
+
+    def update_time(self, now):
+        """刷新计时显示，并把下一次刷新排在显示的数字会变化的时刻"""
+        elapsed = now - self.play_start
         if self.app.game_mode == 'time':
-            self.timer_val -= dt
-            if self.timer_val <= 0:
-                self.timer_val = 0
-                self.game_over()
+            self.timer_val = max(0, self.app.target_value - elapsed)
+            step = 1  # 显示整数秒
+            next_change = self.timer_val - int(self.timer_val) or step
         else:
-            self.timer_val += dt
-
+            self.timer_val = elapsed
+            step = 0.1  # 显示 0.1 秒
+            next_change = step - elapsed % step
         self.update_display_text()
+        self.timer_event = self.clock.after(next_change + 0.001, self.update_time)
 
     def update_display_text(self):
         if self.app.game_mode == 'time':
-            self.timer_lbl.text = f"{int(self.timer_val)}秒"
+            text = f"{int(self.timer_val)}秒"
         else:
             target = self.app.target_value
-            self.timer_lbl.text = f"进度: {selzhehszf.score}/{target}  ({self.timer_val:.1f}秒)"
+            text = f"进度: {self.score}/{target}  ({self.timer_val:.1f}秒)"
+        # 文字没变就不赋值，避免重新生成纹理
+        if self.timer_lbl.text != text:
+            self.timer_lbl.text = text
 
     def stop_timer(self):
         if self.timer_event: self.timer_event.cancel(); self.timer_event = None
+        if self.deadline_event: self.deadline_event.cancel(); self.deadline_event = None
 
     def handle_correct(self, instance):
-        if self.snd_correct and self.snd_correct.state != 'stop': self.snd_correct.stop()
-        if self.snd_correct: self.snd_correct.play()
+        self.sfx.play('correct')
+        self.record_outcome(True)
+        if self.scoreboard:
+            self.scoreboard.send('correct')
 
         self.score += 1
-        self.current_index += 1
 
         if self.app.game_mode == 'score' and self.score >= self.app.target_value:
             self.game_over()
             return
 
+        if self.app.game_mode == 'score':
+            self.update_display_text()  # 进度数字立即更新
         self.show_question()
 
     def handle_wrong(self, instance):
-        if self.snd_wrong and self.snd_wrong.state != 'stop': self.snd_wrong.stop()
-        if self.snd_wrong: self.snd_wrong.play()
+        self.sfx.play('wrong')
+        self.record_outcome(False)
+        if self.scoreboard:
+            self.scoreboard.send('skip')
 
-        self.current_index += 1
         self.show_question()
 
     def game_over(self):
+        if self.app.game_mode == 'score':
+            self.timer_val = self.clock.now() - self.play_start  # 以最后一题的时刻为准
+        else:
+            self.timer_val = 0
+        self.update_display_text()
         self.stop_timer()
+        self.clock.phase = 'over'
         self.stop_sensor()
+        self.clear_ring()
+        self.save_progress()
+        self.app.power.set_quiet(True)  # 结算画面不会再变 (记分板推送除外)
         self.wrong_btn.disabled = True
         self.right_btn.disabled = True
 
@@ -559,59 +1141,245 @@ class GameScreen(Screen):
         else:
             msg = f"挑战成功!\n用时: {self.timer_val:.1f} 秒"
 
-        self.q_lbl.text = msg
-        self.q_lbl.font_size = 50
-        Clock.schedule_once(lambda dt: setattr(self.manager, 'current', 'question_bank'), 4)
+        self.over_msg = msg
+        if self.scoreboard:
+            self.scoreboard.send('final', score=self.score)
+            msg += self.standings_text(self.scoreboard.standings)
+        self.q_lbl.show_text(msg, 50)
+        self.app.get_history().append(self.app.game_mode, self.category, self.app.target_value,
+                                      self.score, self.clock.now() - self.play_start)
+        self.clock.after(4, lambda now: setattr(self.manager, 'current', 'question_bank'))
+
+    def standings_text(self, rows):
+        if not rows:
+            return ''
+        return '\n' + '  '.join(f"{i}. {row[0]} {row[1]}" for i, row in enumerate(rows[:3], 1))
+
+    def on_standings(self, rows):
+        """记分板推来新排名；结算画面上实时刷新前三名"""
+        if self.clock.phase == 'over' and self.manager and self.manager.current == 'game':
+            text = self.over_msg + self.standings_text(rows)
+            if text != self.q_lbl.text:  # 每次推送都会回调，排名没变就不用重新排版
+                self.q_lbl.show_text(text, 50)
 
     def start_sensor(self):
+        accelerometer = get_accelerometer()
         if accelerometer:
             try:
-                accelerometer.enable();
-                self.sensor_event = Clock.schedule_interval(self.check_tilt, 0.1)
+                if not self.sensor_on:
+                    accelerometer.enable()
+                    self.sensor_on = True
+                self.tilt.reset()
+                self.set_sensor_rate()
             except:
                 pass
 
     def stop_sensor(self):
-        if self.sensor_event: self.sensor_event.cancel()
-        if accelerometer:
-            try:
-                accelerometer.disable()
-            except:
-                pass
-
-    def check_tilt(self, dt):
-        if self.is_cooldown or self.wrong_btn.disabled: return
+        if self.sensor_event: self.sensor_event.cancel(); self.sensor_event = None
+        # 只在真正开着时才关 (安卓上每次开关都要经过 jnius 调系统服务)
+        if not self.sensor_on:
+            return
+        self.sensor_on = False
         try:
-            val = accelerometer.acceleration
-            if val and val[2]:
-                if val[2] < -7:
-                    self.handle_correct(None);
-                    self.cooldown()
-                elif val[2] > 7:
-                    self.handle_wrong(None);
-                    self.cooldown()
+            get_accelerometer().disable()
         except:
             pass
 
-    def cooldown(self):
-        self.is_cooldown = True
-        Clock.schedule_once(lambda dt: setattr(self, 'is_cooldown', False), 1.5)
+    def sensor_interval(self):
+        interval = SENSOR_INTERVAL
+        if self.app.power_saving:
+            interval = SAVING_SENSOR_INTERVALS.get(self.clock.phase, SENSOR_INTERVAL)
+        return max(interval, get_accelerometer().period)
+
+    def set_sensor_rate(self):
+        """按对局阶段调整轮询间隔，间隔没变就不动定时器"""
+        interval = self.sensor_interval()
+        if self.sensor_event:
+            if self.sensor_event.interval == interval:
+                return
+            self.sensor_event.cancel()
+        self.sensor_event = self.clock.every(interval, self.check_tilt)
+
+    def check_tilt(self, now):
+        if self.wrong_btn.disabled: return
+        try:
+            samples = get_accelerometer().drain()
+        except:
+            return
+        # 按采样各自的时刻逐个识别，一次取到的多个采样里可能有多次手势
+        for t, _, _, z in samples:
+            gesture = self.tilt.feed(t, z)
+            if gesture == 'correct':
+                self.handle_correct(None)
+            elif gesture == 'wrong':
+                self.handle_wrong(None)
+            if self.sensor_event is None:
+                return  # 这一题结束了整局 (竞速模式达标)，剩下的采样不再处理
+
+        # 触发后直到手机回正之前都算冷却
+        if self.clock.phase in ('play', 'cooldown'):
+            phase = 'play' if self.tilt.armed else 'cooldown'
+            if phase != self.clock.phase:
+                self.clock.phase = phase
+                if self.sensor_event:
+                    self.set_sensor_rate()
+
+
+class LazyScreenManager(ScreenManager):
+    """按需构建界面：注册的界面在第一次被切换到 (或 get_screen) 时才实例化"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.factories = {}
+
+    def register(self, name, factory):
+        self.factories[name] = factory
+
+    def get_screen(self, name):
+        if name in self.factories and not self.has_screen(name):
+            with profiler.phase(f'build screen {name}'):
+                self.add_widget(self.factories.pop(name)(name=name))
+        return super().get_screen(name)
+
+
+# 设置 GUESS_JANK 时给主循环上的回调计时 (见 profiler.py)，必须在创建界面、绑定事件之前
+profiler.instrument(GameScreen, 'update_countdown', 'start_game_logic', 'update_time', 'check_tilt',
+                    'handle_correct', 'handle_wrong', 'show_question', 'prefetch', 'game_over')
+profiler.instrument(QuestionBankScreen, 'update_rows', 'on_row_press', 'on_import_done')
+profiler.instrument(MyPageScreen, 'open_history', 'open_cache')
+profiler.instrument(SettingsPopup, 'open', 'switch_mode', 'switch_sample_mode', 'set_target')
+profiler.instrument(LazyScreenManager, 'on_current')
 
 
 class GuessGameApp(App):
     game_mode = StringProperty('time')
     target_value = NumericProperty(60)
+    sample_mode = StringProperty('random')
+    power_saving = BooleanProperty(False)
+    power = None
+    history = None
+    cache = None
+    layout_metrics = None
+    sfx = None
+    scoreboard = None
+    banks = None  # (已打开的题库, 待导入的 JSON 路径)
+    banks_lock = threading.Lock()
+
+    def get_cache(self):
+        """派生数据缓存目录 (可随时清空)"""
+        if self.cache is None:
+            from cache import Cache
+            self.cache = Cache(os.path.join(self.user_data_dir, 'cache'))
+        return self.cache
+
+    def get_layout_metrics(self):
+        """题目在当前字体、字号下的排版尺寸"""
+        if self.layout_metrics is None:
+            from cache import LayoutMetrics
+            self.layout_metrics = LayoutMetrics(self.get_cache(), CHINESE_FONT, QUESTION_FONT_SIZE)
+        return self.layout_metrics
+
+    def clear_cache(self):
+        """清空缓存目录，返回释放的字节数；内存里的排版数据一并丢弃"""
+        if self.layout_metrics:
+            self.layout_metrics.clear()
+        return self.get_cache().clear()
+
+    def get_sfx(self):
+        if self.sfx is None:
+            with profiler.phase('load sounds'):
+                from sfx import SoundEffects
+                profiler.instrument(SoundEffects, 'play')  # 开启 GUESS_JANK 时统计 play() 占用主线程的时间
+                self.sfx = SoundEffects()
+                for name in SOUNDS:
+                    self.sfx.load(name, f'audio/{name}.wav')
+        return self.sfx
+
+    def get_scoreboard(self):
+        """设置了 GUESS_SCOREBOARD=主机:端口 时接入聚会记分板 (见 scoreboard.py)，否则返回 None"""
+        if self.scoreboard is None and os.environ.get('GUESS_SCOREBOARD'):
+            from scoreboard import ScoreboardClient, PORT
+            host, _, port = os.environ['GUESS_SCOREBOARD'].partition(':')
+            self.scoreboard = ScoreboardClient(host, int(port or PORT), os.environ.get('GUESS_PLAYER'))
+            self.scoreboard.start()
+        return self.scoreboard
+
+    def load_banks(self):
+        """打开内置题库和 <数据目录>/banks/ 下的自定义题库中能直接 mmap 的 (随包发布或缓存里编译好的包)，
+        返回 (题库列表, 还需要解析的 JSON 路径)。欢迎界面在后台线程里调用，所以加锁"""
+        with self.banks_lock:
+            if self.banks is None:
+                cache = self.get_cache()
+                banks = []
+                pending = []
+                with profiler.phase('load word bank'):
+                    custom_dir = os.path.join(self.user_data_dir, 'banks')
+                    custom = sorted(os.path.join(custom_dir, name) for name in os.listdir(custom_dir)
+                                    if name.endswith('.json')) if os.path.isdir(custom_dir) else []
+                    for json_path, pack_path in [('words.json', 'words.pack')] + [(p, '') for p in custom]:
+                        bank = find_pack(json_path, pack_path, cache)
+                        if bank:
+                            banks.append(bank)
+                        elif os.path.exists(json_path):
+                            pending.append(json_path)
+                self.banks = (banks, pending)
+            return self.banks
+
+    def get_history(self):
+        """对局历史，第一次用到时才打开"""
+        if self.history is None:
+            from history import HistoryStore
+            self.history = HistoryStore(os.path.join(self.user_data_dir, 'history'))
+        return self.history
 
     def build(self):
         Window.set_title('你猜我划')
-        sm = ScreenManager()
-        sm.add_widget(WelcomeScreen(name='welcome'))
-        sm.add_widget(MainMenuScreen(name='main_menu'))
-        sm.add_widget(QuestionBankScreen(name='question_bank'))
-        sm.add_widget(MyPageScreen(name='my_page'))
-        sm.add_widget(GameScreen(name='game'))
+        sm = LazyScreenManager()
+        with profiler.phase('build screen welcome'):
+            sm.add_widget(WelcomeScreen(name='welcome'))
+        # 其余界面延迟到首次进入时再构建 (题库、音效由欢迎界面预加载)
+        sm.register('main_menu', MainMenuScreen)
+        sm.register('question_bank', QuestionBankScreen)
+        sm.register('my_page', MyPageScreen)
+        sm.register('game', GameScreen)
+        from power import PowerManager
+        self.power = PowerManager()
+        sm.bind(current=lambda sm, name: self.power.set_quiet(name in MENU_SCREENS))
+        self.bind(power_saving=lambda app, enabled: self.power.set_enabled(enabled))
+        if profiler.enabled:
+            Window.bind(on_flip=self.on_first_frame)
+        profiler.start_monitor()
         return sm
 
+    def on_first_frame(self, *args):
+        Window.unbind(on_flip=self.on_first_frame)
+        profiler.mark('first frame')
+        profiler.dump()
+
+    def on_pause(self):
+        # 安卓切到后台可能被直接杀掉，先把出题记录落盘
+        self.save_state()
+        profiler.dump_jank()
+        return True
+
+    def on_stop(self):
+        self.save_state()
+        if self.scoreboard:
+            self.scoreboard.close()
+        profiler.dump()
+        profiler.dump_jank()
+
+    def save_state(self):
+        if self.root and self.root.has_screen('game'):
+            self.root.get_screen('game').save_progress()
+        if self.history:
+            self.history.save()
+        if self.layout_metrics:
+            try:
+                self.layout_metrics.save()
+            except OSError as e:
+                print(f"警告: 保存排版缓存失败 ({e})")
+
 
 if __name__ == '__main__':
     GuessGameApp().run()
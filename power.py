@@ -0,0 +1,66 @@
+"""省电调度
+
+Kivy 主循环默认每秒醒来 60 次，菜单上什么都没变时也一样 (画面不变时虽然不重绘，但每帧都要处理事件和定时器)。
+开启省电模式后，菜单界面在 IDLE_AFTER 秒内没有触摸、按键就把主循环限到 IDLE_FPS，
+一有输入立刻恢复，滚动、切换界面的动画不受影响。对局中的重力感应采样间隔由 GameScreen 按阶段调整。
+
+wakeups_per_minute() 按 Clock.frames 统计主循环实际醒来的次数 (感应轮询、计时刷新都算在内)，设置弹窗上显示。
+"""
+import time
+
+from kivy.clock import Clock
+from kivy.core.window import Window
+
+IDLE_FPS = 10  # 静止菜单的主循环上限
+IDLE_AFTER = 3.0  # 无输入多久 (秒) 之后限帧
+
+
+class PowerManager:
+    def __init__(self, idle_fps=IDLE_FPS, idle_after=IDLE_AFTER):
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+        self.full_fps = Clock._max_fps  # Kivy 没有公开接口，启动时从 graphics.maxfps 读入，运行中改它即时生效
+        self.enabled = False
+        self.quiet = False  # 当前界面是否静止 (菜单、结算画面)
+        self.capped = False
+        self.last_input = time.monotonic()
+        self.check_event = None
+        self.mark = (self.last_input, Clock.frames)
+        Window.bind(on_touch_down=self.poke, on_touch_move=self.poke, on_key_down=self.poke)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.apply()
+
+    def set_quiet(self, quiet):
+        if quiet != self.quiet:
+            self.quiet = quiet
+            self.last_input = time.monotonic()  # 切换界面的动画还要按满帧播完
+            self.apply()
+
+    def poke(self, *args):
+        # 不拦截事件，只记下时间；已经限帧时立即恢复
+        self.last_input = time.monotonic()
+        if self.capped:
+            self.apply()
+
+    def apply(self):
+        wait = self.last_input + self.idle_after - time.monotonic() if self.enabled and self.quiet else 0
+        capped = self.enabled and self.quiet and wait <= 0
+        if capped != self.capped:
+            self.capped = capped
+            Clock._max_fps = self.idle_fps if capped else self.full_fps
+        if wait > 0 and not self.check_event:
+            # 只挂一个检查事件，期间有新输入就到时再顺延
+            self.check_event = Clock.schedule_once(self.recheck, wait)
+
+    def recheck(self, dt):
+        self.check_event = None
+        self.apply()
+
+    def wakeups_per_minute(self):
+        """自上次调用 (或启动) 以来，主循环平均每分钟醒来的次数"""
+        now, frames = time.monotonic(), Clock.frames
+        start, start_frames = self.mark
+        self.mark = (now, frames)
+        return (frames - start_frames) * 60 / max(now - start, 1e-6)
@@ -0,0 +1,61 @@
+"""启动画面期间的资源预加载
+
+欢迎界面显示的那一两秒原本什么都不做，字体、音效、题库要等到第一次用到时才在主线程上加载。
+这里把它们拆成若干任务，每个任务一个后台线程同时跑 (主要是磁盘读取和 mmap)，
+跑完后的收尾 (需要在主线程做的，如创建 Kivy 对象) 通过 post (默认 Kivy Clock) 回到主线程执行。
+"""
+import threading
+
+
+def read_file(path, chunk_size=1 << 20):
+    """把文件完整读一遍 (进入系统页缓存，之后主线程再打开就不用等磁盘)，返回字节数"""
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            size += len(chunk)
+    return size
+
+
+class Preloader:
+    """tasks: [(名称, 后台函数, 主线程收尾函数或 None), ...]
+
+    后台函数的返回值传给收尾函数；出错只打印警告，用到时各处会自己再加载一次。
+    每完成一个任务调用 on_progress(已完成数, 总数)，全部完成后调用 on_done()。
+    """
+
+    def __init__(self, tasks, on_progress, on_done, post=None):
+        self.tasks = tasks
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.finished = 0
+        if post is None:
+            from kivy.clock import Clock
+            post = lambda fn: Clock.schedule_once(lambda dt: fn())
+        self.post = post
+
+    def start(self):
+        if not self.tasks:
+            self.post(self.on_done)
+        for task in self.tasks:
+            threading.Thread(target=self.run, args=task, daemon=True).start()
+
+    def run(self, name, work, finish):
+        try:
+            result = work()
+        except Exception as e:
+            print(f"警告: 预加载 {name} 失败 ({e})")
+            self.post(self.task_done)
+            return
+        self.post(lambda: self.task_done(finish, result))
+
+    def task_done(self, finish=None, result=None):
+        # 只在主线程上调用，不需要加锁
+        if finish:
+            try:
+                finish(result)
+            except Exception as e:
+                print(f"警告: 预加载收尾失败 ({e})")
+        self.finished += 1
+        self.on_progress(self.finished, len(self.tasks))
+        if self.finished == len(self.tasks):
+            self.on_done()
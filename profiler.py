@@ -0,0 +1,210 @@
+"""启动阶段打点 (默认关闭)
+
+设置环境变量 GUESS_PROFILE=startup.json 后运行，各阶段的起止时间和内存占用会写成
+Chrome trace 格式，用 chrome://tracing 或 https://ui.perfetto.dev 打开即可对比不同版本。
+首帧画出后写一次，退出时再写一次 (包含之后才构建的界面)。
+
+main.py 最先导入本模块，时间以导入本模块的时刻为 0。
+
+运行时卡顿监测 (默认关闭)：设置 GUESS_JANK=jank.json 后运行，
+instrument() 登记过的回调 (计时刷新、重力感应、答题、菜单操作等) 逐次计时，按耗时分桶统计；
+每帧的间隔连同这一帧里最慢的回调记在环形缓冲里，超过 JANK_MS 的帧另外记一条卡顿记录。
+屏幕左上角叠加显示帧率和最慢的回调，切到后台或退出时写出 JSON，现场的卡顿可以对应到具体代码。
+"""
+import functools
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+
+PROFILE_PATH = os.environ.get('GUESS_PROFILE')
+enabled = bool(PROFILE_PATH)
+
+_t0 = time.perf_counter()
+_events = []
+_page_kb = os.sysconf('SC_PAGE_SIZE') // 1024 if hasattr(os, 'sysconf') else 4
+
+
+def _now_us():
+    return (time.perf_counter() - _t0) * 1e6
+
+
+def rss_kb():
+    """当前常驻内存 (KB)；没有 /proc 的平台退回进程峰值"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _page_kb
+    except (OSError, IndexError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _memory(ts):
+    _events.append({'name': 'memory', 'ph': 'C', 'ts': ts, 'pid': 1, 'tid': 1, 'args': {'rss_kb': rss_kb()}})
+
+
+@contextmanager
+def phase(name):
+    """记录一个阶段的耗时，以及阶段结束时的内存"""
+    if not enabled:
+        yield
+        return
+    start = _now_us()
+    try:
+        yield
+    finally:
+        end = _now_us()
+        _events.append({'name': name, 'ph': 'X', 'ts': start, 'dur': end - start, 'pid': 1, 'tid': 1})
+        _memory(end)
+
+
+def mark(name):
+    """记录一个时间点 (如首帧)"""
+    if enabled:
+        ts = _now_us()
+        _events.append({'name': name, 'ph': 'i', 's': 'g', 'ts': ts, 'pid': 1, 'tid': 1})
+        _memory(ts)
+
+
+def latency_stats(latencies):
+    """一组耗时 (秒) 的统计，单位毫秒"""
+    if not latencies:
+        return {'count': 0}
+    ordered = sorted(latencies)
+    n = len(ordered)
+    return {
+        'count': n,
+        'mean': 1000 * sum(ordered) / n,
+        'p50': 1000 * ordered[n // 2],
+        'p95': 1000 * ordered[min(n - 1, int(n * 0.95))],
+        'max': 1000 * ordered[-1],
+    }
+
+
+def dump(path=None):
+    if not enabled:
+        return
+    with open(path or PROFILE_PATH, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': _events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+
+# ==================== 运行时卡顿监测 ====================
+JANK_PATH = os.environ.get('GUESS_JANK')
+jank_enabled = bool(JANK_PATH)
+
+FRAME_RING = 600  # 保留最近多少帧 (60fps 下约 10 秒)
+JANK_MS = 33.0  # 帧间隔超过这么多毫秒 (掉了一帧以上) 算卡顿
+BUCKETS_MS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)  # 耗时分桶上界，最后一桶是 64ms 以上
+
+_callbacks = {}  # 名称 -> [次数, 总耗时, 最大耗时, 各桶计数]
+_frames = deque(maxlen=FRAME_RING)  # (帧间隔 ms, 本帧最慢的回调, 其耗时 ms)
+_janks = deque(maxlen=200)  # (距启动秒数, 帧间隔 ms, 本帧最慢的回调, 其耗时 ms)
+_worst = [None, 0.0]  # 当前帧里最慢的回调
+_monitor = None
+
+
+def _record(name, seconds):
+    stats = _callbacks.get(name)
+    if stats is None:
+        stats = _callbacks[name] = [0, 0.0, 0.0, [0] * (len(BUCKETS_MS) + 1)]
+    ms = seconds * 1000
+    stats[0] += 1
+    stats[1] += ms
+    if ms > stats[2]:
+        stats[2] = ms
+    bucket = 0
+    while bucket < len(BUCKETS_MS) and ms > BUCKETS_MS[bucket]:
+        bucket += 1
+    stats[3][bucket] += 1
+    if ms > _worst[1]:
+        _worst[0], _worst[1] = name, ms
+
+
+def timed(name, fn):
+    """返回计时版本的 fn"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _record(name, time.perf_counter() - start)
+    return wrapper
+
+
+def instrument(cls, *names):
+    """把类上的方法换成计时版本；要在创建实例、绑定事件之前调用。未开启时什么都不做"""
+    if not jank_enabled:
+        return
+    for name in names:
+        setattr(cls, name, timed(f"{cls.__name__}.{name}", getattr(cls, name)))
+
+
+class FrameMonitor:
+    """每帧记一次帧间隔，左上角叠加显示统计"""
+
+    def __init__(self):
+        from kivy.clock import Clock
+        from kivy.core.window import Window
+        from kivy.uix.label import Label
+        self.last = None
+        self.overlay = Label(text='', font_size=14, color=(1, 0, 0, 1), halign='left', valign='top',
+                             size_hint=(None, None), size=(520, 40))
+        self.overlay.text_size = self.overlay.size
+        # 画在 canvas.after 里：在 build() 里创建时根界面还没加进窗口，普通 add_widget 会被之后加入的界面盖住
+        Window.add_widget(self.overlay, canvas='after')
+        Window.bind(size=self.place)
+        self.place(Window, Window.size)
+        Clock.schedule_interval(self.tick, 0)
+        Clock.schedule_interval(self.refresh, 0.5)
+
+    def place(self, window, size):
+        self.overlay.pos = (4, size[1] - self.overlay.height - 4)
+
+    def tick(self, dt):
+        now = time.perf_counter()
+        if self.last is not None:
+            frame_ms = (now - self.last) * 1000
+            _frames.append((round(frame_ms, 2), _worst[0], round(_worst[1], 2)))
+            if frame_ms > JANK_MS:
+                _janks.append((round(now - _t0, 3), round(frame_ms, 2), _worst[0], round(_worst[1], 2)))
+        self.last = now
+        _worst[0], _worst[1] = None, 0.0
+
+    def refresh(self, dt):
+        stats = frame_stats()
+        if not stats['frames']:
+            return
+        text = f"FPS {stats['fps']:.0f}  p95 {stats['p95_ms']:.1f}ms  jank {len(_janks)}"
+        slowest = max(_callbacks.items(), key=lambda kv: kv[1][2], default=None)
+        if slowest:
+            text += f"\nmax {slowest[0]} {slowest[1][2]:.1f}ms"
+        self.overlay.text = text
+
+
+def start_monitor():
+    """窗口建好之后调用"""
+    global _monitor
+    if jank_enabled and _monitor is None:
+        _monitor = FrameMonitor()
+
+
+def frame_stats():
+    times = sorted(f[0] for f in _frames)
+    if not times:
+        return {'frames': 0}
+    n = len(times)
+    return {'frames': n, 'fps': 1000 * n / sum(times), 'p50_ms': times[n // 2],
+            'p95_ms': times[min(n - 1, int(n * 0.95))], 'max_ms': times[-1]}
+
+
+def dump_jank(path=None):
+    if not jank_enabled:
+        return
+    callbacks = {name: {'count': c, 'mean_ms': round(total / c, 3), 'max_ms': round(worst, 3),
+                        'histogram': dict(zip([f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"], hist))}
+                 for name, (c, total, worst, hist) in _callbacks.items()}
+    with open(path or JANK_PATH, 'w', encoding='utf-8') as f:
+        json.dump({'frame_stats': frame_stats(), 'jank_ms': JANK_MS, 'callbacks': callbacks,
+                   'janks': list(_janks), 'recent_frames': list(_frames)}, f, ensure_ascii=False, indent=1)
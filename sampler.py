@@ -0,0 +1,291 @@
+"""出题抽样
+
+DeckSampler 记录每个类别已经出现过的词条 (每个词条 1 bit 的位图)，并写到磁盘，
+这样连续多局、甚至重启 App 之后也不会重复出题，直到整个类别都出现过一遍才重置。
+
+WordStats 记录每个词条的出题、答对、跳过次数和答对用时；
+WeightedDeck 按由此算出的难度加权抽样 (树状数组，抽取和改权重都是 O(log n))。
+"""
+import hashlib
+import os
+import random
+import struct
+from array import array
+
+DECK_MAGIC = b'GGDK'
+DECK_HEADER = struct.Struct('<4sII')
+STATS_MAGIC = b'GGWS'
+STATS_HEADER = struct.Struct('<4sII')  # magic | 词条数 | 词条区字节数
+SLOW_TIME = 10.0  # 答对用时达到这么多秒算作很难
+HARD = 0.5  # 难度不低于这个值的算难题
+
+
+class DeckSampler:
+    """不放回抽样：每次 draw() 期望 O(1)，不复制题目列表"""
+
+    def __init__(self, path, size, rng=random):
+        self.path = path
+        self.size = size
+        self.rng = rng
+        self.seen = bytearray((size + 7) // 8)
+        self.n_seen = 0
+        self.pool = None  # 尚未出现的下标，已出现过半后才一次性构建
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            magic, size, n_seen = DECK_HEADER.unpack_from(data, 0)
+            bits = data[DECK_HEADER.size:]
+        except (OSError, struct.error):
+            return
+        # 题库词条数变了，旧位图作废
+        if magic == DECK_MAGIC and size == self.size and len(bits) == len(self.seen):
+            self.seen[:] = bits
+            self.n_seen = n_seen
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(DECK_HEADER.pack(DECK_MAGIC, self.size, self.n_seen))
+            f.write(self.seen)
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        self.seen = bytearray(len(self.seen))
+        self.n_seen = 0
+        self.pool = None
+
+    def is_seen(self, i):
+        return self.seen[i >> 3] & (1 << (i & 7))
+
+    def mark(self, i):
+        if not self.is_seen(i):
+            self.seen[i >> 3] |= 1 << (i & 7)
+            self.n_seen += 1
+
+    def put_back(self, i):
+        """撤销一次抽取 (抽出来预渲染了但没展示的题)"""
+        if self.is_seen(i):
+            self.seen[i >> 3] &= ~(1 << (i & 7))
+            self.n_seen -= 1
+            if self.pool is not None:
+                self.pool.append(i)
+
+    def draw(self):
+        if not self.size:
+            raise IndexError("空题库")
+        if self.n_seen >= self.size:
+            self.reset()
+
+        if self.pool is None and self.n_seen * 2 < self.size:
+            # 未出现的超过一半：随机拒绝采样，期望不超过 2 次
+            while True:
+                i = self.rng.randrange(self.size)
+                if not self.is_seen(i):
+                    self.mark(i)
+                    return i
+
+        if self.pool is None:
+            self.pool = array('I', (i for i in range(self.size) if not self.is_seen(i)))
+        j = self.rng.randrange(len(self.pool))
+        i = self.pool[j]
+        self.pool[j] = self.pool[-1]
+        self.pool.pop()
+        self.mark(i)
+        return i
+
+
+class DeckStore:
+    """按类别名管理 DeckSampler，位图文件保存在 root 目录下"""
+
+    def __init__(self, root):
+        self.root = root
+        self.decks = {}
+
+    def get(self, category, size):
+        deck = self.decks.get(category)
+        if deck is None or deck.size != size:
+            name = hashlib.md5(category.encode('utf-8')).hexdigest()[:16]
+            deck = self.decks[category] = DeckSampler(os.path.join(self.root, name + '.deck'), size)
+        return deck
+
+    def save(self):
+        for deck in self.decks.values():
+            try:
+                deck.save()
+            except OSError as e:
+                print(f"警告: 保存出题记录失败 ({e})")
+
+
+class WordStats:
+    """每个词条的答题统计，按词条文本记录 (跨类别、跨题库通用)
+
+    数据存在几个并排的 array 里 (下标即词条的槽位)，5 万词条也只占几百 KB；
+    文件格式: 文件头 | 出题次数 u32[n] | 答对次数 u32[n] | 跳过次数 u32[n] | 答对总用时(毫秒) u32[n] | 词条 (UTF-8，'\\0' 分隔)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.slots = {}
+        self.shown = array('I')
+        self.correct = array('I')
+        self.skipped = array('I')
+        self.time_ms = array('I')
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            magic, n, words_len = STATS_HEADER.unpack_from(data, 0)
+            if magic != STATS_MAGIC:
+                return
+            offset = STATS_HEADER.size
+            columns = []
+            for _ in range(4):
+                column = array('I')
+                column.frombytes(data[offset:offset + n * column.itemsize])
+                offset += n * column.itemsize
+                columns.append(column)
+            words = data[offset:offset + words_len].decode('utf-8').split('\x00') if n else []
+        except (OSError, struct.error, ValueError):
+            return
+        if len(words) != n or any(len(c) != n for c in columns):
+            return
+        self.shown, self.correct, self.skipped, self.time_ms = columns
+        self.slots = {word: i for i, word in enumerate(words)}
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        words = '\x00'.join(self.slots).encode('utf-8')
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(STATS_HEADER.pack(STATS_MAGIC, len(self.slots), len(words)))
+            for column in (self.shown, self.correct, self.skipped, self.time_ms):
+                f.write(column.tobytes())
+            f.write(words)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def record(self, word, correct, elapsed):
+        """记一次作答：correct 为 False 表示跳过"""
+        i = self.slots.get(word)
+        if i is None:
+            i = self.slots[word] = len(self.shown)
+            for column in (self.shown, self.correct, self.skipped, self.time_ms):
+                column.append(0)
+        self.shown[i] += 1
+        if correct:
+            self.correct[i] += 1
+            self.time_ms[i] = min(self.time_ms[i] + int(elapsed * 1000), 0xFFFFFFFF)
+        else:
+            self.skipped[i] += 1
+        self.dirty = True
+
+    def difficulty(self, word):
+        """0~1，没出过的词条为 0.5：主要看跳过率 (加 1 平滑)，其次看答对平均用时"""
+        i = self.slots.get(word)
+        if i is None:
+            return 0.5
+        skip = (self.skipped[i] + 1) / (self.shown[i] + 2)
+        slow = min(1.0, self.time_ms[i] / 1000 / self.correct[i] / SLOW_TIME) if self.correct[i] else 0.5
+        return 0.7 * skip + 0.3 * slow
+
+    def weight(self, word, mode):
+        """抽样权重。balanced：难题多出、简单的少出但不绝迹；hard：只出做过且难度高的"""
+        d = self.difficulty(word)
+        if mode == 'hard':
+            return 1.0 if d >= HARD and word in self.slots else 0.0
+        return 0.25 + d
+
+
+class WeightedDeck:
+    """按权重不放回抽样，接口与 DeckSampler 一致 (draw / put_back / save)
+
+    权重存在树状数组里，draw() 和 set_weight() 都是 O(log n)；
+    抽出的词条权重暂时置 0 (原权重记在 drawn 里)，全部抽完后再一起放回。
+    """
+
+    def __init__(self, weights, rng=random):
+        self.rng = rng
+        self.size = len(weights)
+        self.weights = array('d', weights)
+        self.drawn = {}
+        self.build()
+
+    def build(self):
+        """O(n) 建树，顺便消除多次增减累积的浮点误差"""
+        n = self.size
+        tree = array('d', [0.0]) * (n + 1)
+        for i, w in enumerate(self.weights, 1):
+            tree[i] += w
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self.tree = tree
+        self.total = sum(self.weights)
+
+    def add(self, i, delta):
+        self.total += delta
+        i += 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def set_weight(self, i, w):
+        """改权重；已抽出的词条改的是它放回之后的权重"""
+        if i in self.drawn:
+            self.drawn[i] = w
+        else:
+            self.add(i, w - self.weights[i])
+            self.weights[i] = w
+
+    def find(self, target):
+        """前缀和第一次超过 target 的下标"""
+        pos = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] <= target:
+                pos = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        return pos
+
+    def reset(self):
+        for i, w in self.drawn.items():
+            self.weights[i] = w
+        self.drawn.clear()
+        self.build()
+
+    def draw(self):
+        if not self.size:
+            raise IndexError("空题库")
+        if self.total <= 1e-9:
+            self.reset()
+            if self.total <= 1e-9:
+                raise IndexError("没有可出的题")
+        i = self.find(self.rng.random() * self.total)
+        if i >= self.size or self.weights[i] <= 0:
+            # 浮点误差落到了边界外，重建后再抽一次
+            self.build()
+            i = min(self.find(self.rng.random() * self.total), self.size - 1)
+        self.drawn[i] = self.weights[i]
+        self.add(i, -self.weights[i])
+        self.weights[i] = 0.0
+        return i
+
+    def put_back(self, i):
+        w = self.drawn.pop(i, None)
+        if w is not None:
+            self.weights[i] = w
+            self.add(i, w)
+
+    def save(self):
+        pass  # 不跨局记录已出过的题，统计由 WordStats 保存
@@ -0,0 +1,373 @@
+"""聚会记分板 (可选)
+
+一台手机或电脑运行记分板服务，其他手机开局后把每题结果 (答对、跳过) 和最终得分发过来，
+服务端汇总成实时排名再推回给所有人。
+
+协议：TCP 上每行一个 JSON (UTF-8)，字段尽量短。
+    客户端 -> 服务端: {"t": "hello", "id": ..., "name": ...}   连接后第一条 (同 id 重连沿用原成绩)
+                      {"t": "round", "seq": n}                 新的一局，清零本局成绩
+                      {"t": "correct", "seq": n} / {"t": "skip", "seq": n}
+                      {"t": "final", "score": 12, "seq": n}    一局结束
+    服务端 -> 客户端: {"t": "standings", "rows": [[名字, 得分, 答对, 跳过, 是否已结束, 是否在线, seq], ...]}
+客户端把 BATCH_INTERVAL 内的事件攒成一次写入；服务端排名有变化时最多每 BROADCAST_INTERVAL 推送一次，
+同一份编码好的数据写给所有连接，读取慢、积压过多的连接直接断开，几十人同时玩也不会拖慢别人。
+
+用法:
+    python scoreboard.py [--host 0.0.0.0] [--port 8765]      运行记分板服务
+    python scoreboard.py --simulate 40 [--duration 10]       本机回环上模拟 40 个玩家，输出延迟和内存
+手机上设置环境变量 GUESS_SCOREBOARD=主机:端口 (可选 GUESS_PLAYER=名字) 后启动即可接入。
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+
+PORT = 8765
+BATCH_INTERVAL = 0.03  # 客户端攒批时长 (秒)
+BROADCAST_INTERVAL = 0.1  # 排名推送的最短间隔 (秒)
+MAX_LINE = 4096
+MAX_BACKLOG = 256 * 1024  # 单个连接未发出的数据超过这么多就断开
+RECONNECT_DELAY = 2.0
+
+
+def encode(msg):
+    return (json.dumps(msg, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+# ==================== 服务端 ====================
+class Player:
+    __slots__ = ('name', 'score', 'correct', 'skipped', 'final', 'online', 'seq')
+
+    def __init__(self, name):
+        self.name = name
+        self.score = 0
+        self.correct = 0
+        self.skipped = 0
+        self.final = False
+        self.online = True
+        self.seq = 0
+
+    def row(self):
+        return [self.name, self.score, self.correct, self.skipped, self.final, self.online, self.seq]
+
+
+class ScoreboardServer:
+    def __init__(self, host='0.0.0.0', port=PORT, interval=BROADCAST_INTERVAL):
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.players = {}
+        self.writers = set()
+        self.handlers = set()
+        self.changed = asyncio.Event()
+        self.server = None
+        self.task = None
+
+    async def start(self):
+        """开始监听，返回实际端口 (port=0 时由系统分配)"""
+        self.server = await asyncio.start_server(self.handle, self.host, self.port, limit=MAX_LINE)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.task = asyncio.create_task(self.broadcast_loop())
+        return self.port
+
+    async def stop(self):
+        self.task.cancel()
+        self.server.close()
+        for writer in list(self.writers):
+            writer.close()
+        # 连接关闭后各连接的读循环自然结束
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        player = None
+        self.writers.add(writer)
+        self.handlers.add(asyncio.current_task())
+        if self.players:
+            writer.write(self.encode_standings())  # 新连接先拿到当前排名
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(msg, dict):
+                    player = self.apply(player, msg)
+        except (ConnectionError, ValueError):  # ValueError: 单行超过 MAX_LINE
+            pass
+        finally:
+            self.writers.discard(writer)
+            self.handlers.discard(asyncio.current_task())
+            if player:
+                player.online = False
+                self.mark_dirty()
+            writer.close()
+
+    def apply(self, player, msg):
+        """把一条客户端消息计入成绩，返回该连接对应的玩家"""
+        kind = msg.get('t')
+        if kind == 'hello':
+            key = str(msg.get('id') or msg.get('name'))
+            name = str(msg.get('name') or key)[:20]
+            player = self.players.get(key)
+            if player is None:
+                player = self.players[key] = Player(name)
+            player.name = name
+            player.online = True
+        elif player is None:
+            return None  # 没打招呼的连接发来的事件不认
+        elif kind == 'round':
+            player.score = player.correct = player.skipped = 0
+            player.final = False
+        elif kind == 'correct':
+            player.correct += 1
+            player.score += 1
+        elif kind == 'skip':
+            player.skipped += 1
+        elif kind == 'final':
+            player.score = int(msg.get('score', player.score))
+            player.final = True
+        else:
+            return player
+        seq = msg.get('seq')
+        if isinstance(seq, int):
+            player.seq = seq
+        self.mark_dirty()
+        return player
+
+    def mark_dirty(self):
+        self.changed.set()
+
+    def standings(self):
+        return sorted(self.players.values(), key=lambda p: (-p.score, p.skipped, p.name))
+
+    def encode_standings(self):
+        return encode({'t': 'standings', 'rows': [p.row() for p in self.standings()]})
+
+    async def broadcast_loop(self):
+        while True:
+            await self.changed.wait()
+            self.changed.clear()
+            data = self.encode_standings()  # 编码一次，发给所有人
+            for writer in list(self.writers):
+                if writer.transport.get_write_buffer_size() > MAX_BACKLOG:
+                    self.writers.discard(writer)
+                    writer.close()
+                    continue
+                writer.write(data)
+            # 推送之后至少隔 interval 再推下一次，期间的变化合并成一次
+            await asyncio.sleep(self.interval)
+
+
+# ==================== 客户端 (游戏内使用，普通线程，不依赖事件循环) ====================
+class ScoreboardClient:
+    """把本机的答题事件发给记分板，收到的排名存在 standings 里
+
+    send() 只是放进队列，不会阻塞主线程；后台线程每 BATCH_INTERVAL 把攒下的事件一次写出，
+    断线后自动重连，重连期间的事件留在队列里。on_standings 经 post (默认 Kivy Clock) 在主线程回调。
+    """
+
+    def __init__(self, host, port, name, player_id=None, on_standings=None, post=None):
+        self.address = (host, port)
+        self.player_id = player_id or uuid.uuid4().hex[:12]
+        self.name = name or f'玩家{self.player_id[:4]}'
+        self.on_standings = on_standings
+        if post is None:
+            from kivy.clock import Clock
+            post = lambda fn: Clock.schedule_once(lambda dt: fn())
+        self.post = post
+        self.queue = deque()
+        self.wakeup = threading.Event()
+        self.seq = 0
+        self.standings = []
+        self.running = False
+        self.sock = None
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def close(self):
+        self.running = False
+        self.wakeup.set()
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+
+    def send(self, kind, **fields):
+        self.seq += 1
+        fields['t'] = kind
+        fields['seq'] = self.seq
+        self.queue.append(encode(fields))
+        self.wakeup.set()
+
+    def run(self):
+        while self.running:
+            try:
+                self.sock = socket.create_connection(self.address, timeout=5)
+            except OSError:
+                time.sleep(RECONNECT_DELAY)
+                continue
+            self.sock.settimeout(None)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self.read_loop, args=(self.sock,), daemon=True).start()
+            try:
+                self.sock.sendall(encode({'t': 'hello', 'id': self.player_id, 'name': self.name}))
+                self.write_loop()
+            except OSError:
+                pass
+            self.sock.close()
+            if self.running:
+                time.sleep(RECONNECT_DELAY)
+
+    def write_loop(self):
+        while self.running:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            time.sleep(BATCH_INTERVAL)  # 连续的事件 (如最后一题答对 + 结束) 合并成一次写入
+            batch = []
+            while self.queue:
+                batch.append(self.queue.popleft())
+            if batch:
+                try:
+                    self.sock.sendall(b''.join(batch))
+                except OSError:
+                    self.queue.extendleft(reversed(batch))  # 重连后再发
+                    raise
+
+    def read_loop(self, sock):
+        try:
+            for line in sock.makefile('rb'):
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    continue
+                if msg.get('t') == 'standings':
+                    self.standings = msg['rows']
+                    if self.on_standings:
+                        rows = msg['rows']
+                        self.post(lambda: self.on_standings(rows))
+        except (OSError, ValueError):
+            pass
+
+
+# ==================== 回环模拟 ====================
+async def simulated_player(i, port, duration, latencies, counters):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=1 << 20)
+    name = f'玩家{i}'
+    sent = {1: time.perf_counter()}  # seq -> 发送时刻
+    writer.write(encode({'t': 'hello', 'id': f'sim{i}', 'name': name}) + encode({'t': 'round', 'seq': 1}))
+    counters['events'] += 1
+    done = asyncio.Event()
+
+    async def read():
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            counters['messages'] += 1
+            counters['bytes'] += len(line)
+            now = time.perf_counter()
+            for row in json.loads(line)['rows']:
+                if row[0] == name:
+                    for seq in [s for s in sent if s <= row[6]]:
+                        latencies.append(now - sent.pop(seq))
+            if done.is_set() and not sent:
+                break
+
+    read_task = asyncio.create_task(read())
+    seq = 1
+    batch = []
+    rng = random.Random(i)
+    end = time.perf_counter() + duration
+    score = 0
+    while time.perf_counter() < end:
+        # 玩家平均一两秒答一题，偶尔两题挨得很近
+        await asyncio.sleep(rng.uniform(0.05, 2.0))
+        seq += 1
+        kind = 'correct' if rng.random() < 0.7 else 'skip'
+        score += kind == 'correct'
+        batch.append(encode({'t': kind, 'seq': seq}))
+        sent[seq] = time.perf_counter()
+        await asyncio.sleep(BATCH_INTERVAL)
+        writer.write(b''.join(batch))
+        counters['events'] += len(batch)
+        batch.clear()
+        await writer.drain()
+    seq += 1
+    writer.write(encode({'t': 'final', 'score': score, 'seq': seq}))
+    sent[seq] = time.perf_counter()
+    counters['events'] += 1
+    done.set()
+    try:
+        await asyncio.wait_for(read_task, 5)
+    except asyncio.TimeoutError:
+        pass
+    writer.close()
+
+
+async def simulate(n, duration):
+    from profiler import latency_stats, rss_kb
+
+    rss_before = rss_kb()
+    server = ScoreboardServer('127.0.0.1', 0)
+    port = await server.start()
+    latencies = []
+    counters = {'events': 0, 'messages': 0, 'bytes': 0}
+    start = time.perf_counter()
+    await asyncio.gather(*(simulated_player(i, port, duration, latencies, counters) for i in range(n)))
+    elapsed = time.perf_counter() - start
+    top = server.standings()[:3]
+    await server.stop()
+
+    stats = latency_stats(latencies)
+    print(f"{n} 个玩家, {elapsed:.1f} 秒, {counters['events']} 个事件, "
+          f"收到排名推送 {counters['messages']} 次 ({counters['bytes'] / 1024:.0f} KB)")
+    if stats['count']:
+        print(f"事件到排名更新的延迟 (ms): 平均 {stats['mean']:.1f}  p50 {stats['p50']:.1f}  "
+              f"p95 {stats['p95']:.1f}  最大 {stats['max']:.1f}")
+    print(f"内存增加: {rss_kb() - rss_before} KB")
+    print("前三名: " + ', '.join(f"{p.name} {p.score}" for p in top))
+
+
+async def serve(host, port):
+    server = ScoreboardServer(host, port)
+    port = await server.start()
+    print(f"记分板已启动: {host}:{port}")
+    last = None
+    while True:
+        await asyncio.sleep(2)
+        rows = [p.row() for p in server.standings()]
+        if rows != last:
+            last = rows
+            print(' | '.join(f"{r[0]} {r[1]}{'✓' if r[4] else ''}{'' if r[5] else '(离线)'}" for r in rows))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='你猜我划 聚会记分板')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--simulate', type=int, metavar='N', help='在回环上模拟 N 个玩家')
+    parser.add_argument('--duration', type=float, default=10, help='模拟时长 (秒)')
+    args = parser.parse_args()
+    try:
+        if args.simulate:
+            asyncio.run(simulate(args.simulate, args.duration))
+        else:
+            asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,92 @@
+"""题库类别搜索
+
+支持按类别名、词条、以及它们的拼音首字母 (如 "hzw" 匹配 "海贼王") 搜索。
+拼音首字母用 GB2312 一级汉字按拼音排序的特性查表得到；
+其余汉字 (二级汉字、GB2312 以外的字，如 "橄榄") 用 pypinyin 补充。pypinyin 随 APK 打包，
+但导入要加载整个拼音字典，所以第一次遇到这类字时才导入 (词条索引在后台线程里建)；没装时跳过。
+"""
+import bisect
+
+# GB2312 一级汉字 (0xB0A1-0xD7F9) 中每个声母的第一个字的编码
+_GB_STARTS = [0xB0A1, 0xB0C5, 0xB2C1, 0xB4EE, 0xB6EA, 0xB7A2, 0xB8C1, 0xB9FE, 0xBBF7, 0xBFA6, 0xC0AC, 0xC2E8,
+              0xC4C3, 0xC5B6, 0xC5BE, 0xC6DA, 0xC8BB, 0xC8F6, 0xCBFA, 0xCDDA, 0xCEF4, 0xD1B9, 0xD4D1]
+_GB_LETTERS = 'abcdefghjklmnopqrstwxyz'
+_GB_END = 0xD7F9
+
+_pinyin = False  # False 表示尚未导入，None 表示没装
+
+
+def _first_letter(ch):
+    global _pinyin
+    if _pinyin is False:
+        try:
+            from pypinyin import lazy_pinyin, Style
+            _pinyin = lambda c: lazy_pinyin(c, style=Style.FIRST_LETTER)[0][:1].lower()
+        except ImportError:
+            _pinyin = None
+    return _pinyin(ch) if _pinyin else ''
+
+
+def initial(ch):
+    """单个字符的拼音首字母；字母数字原样 (小写) 返回，其他符号返回空串"""
+    if ch.isascii():
+        return ch.lower() if ch.isalnum() else ''
+    try:
+        code = int.from_bytes(ch.encode('gb2312'), 'big')
+    except UnicodeEncodeError:
+        code = 0
+    if _GB_STARTS[0] <= code <= _GB_END:
+        return _GB_LETTERS[bisect.bisect_right(_GB_STARTS, code) - 1]
+    if '一' <= ch <= '鿿':
+        return _first_letter(ch)
+    return ''
+
+
+def initials(text):
+    return ''.join(initial(ch) for ch in text)
+
+
+class CategoryIndex:
+    """类别搜索索引
+
+    类别名在创建时就建好索引；词条可以之后 (例如在后台线程里) 用 add_words() 逐个类别补充。
+    连续输入时，如果新的查询是上一次查询的延伸且索引没有变化，只在上一次的结果里继续筛选。
+    """
+
+    def __init__(self, categories):
+        self.names = list(categories)
+        self.name_keys = [name.lower() + '\x00' + initials(name) for name in self.names]
+        self.word_keys = [''] * len(self.names)
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        self.version = 0
+        self.last = ('', -1, list(range(len(self.names))))  # (查询, 索引版本, 结果下标)
+
+    def add_words(self, category, words):
+        i = self.positions.get(category)
+        if i is None:
+            return
+        # 用 '\0' 分隔，查询不会跨词条匹配
+        self.word_keys[i] = '\x00'.join(w.lower() for w in words) + '\x00' + '\x00'.join(initials(w) for w in words)
+        self.version += 1
+
+    def search(self, query):
+        """返回匹配的类别名列表，类别名匹配的排在只有词条匹配的前面"""
+        q = query.strip().lower()
+        if not q:
+            return list(self.names)
+        last_query, last_version, last_result = self.last
+        if last_query and q.startswith(last_query) and last_version == self.version:
+            candidates = last_result
+        else:
+            candidates = range(len(self.names))
+
+        by_name = []
+        by_word = []
+        for i in candidates:
+            if q in self.name_keys[i]:
+                by_name.append(i)
+            elif q in self.word_keys[i]:
+                by_word.append(i)
+        result = by_name + by_word
+        self.last = (q, self.version, result)
+        return [self.names[i] for i in result]
@@ -0,0 +1,70 @@
+"""答题音效
+
+所有音效在启动时预先加载好，播放时从多路声道里挑一个空闲的，连续快速答题时声音可以叠加，
+不需要先 stop() 再 play() 同一个 Sound。
+安卓上直接用系统 SoundPool (每个音效只解码一次、原生混音、play() 异步返回)；
+其他平台用 Kivy SoundLoader，每个音效预先建好 VOICES 个 Sound 轮流使用 (每个 Sound 各解码一份)。
+
+play() 本身在主线程上占用的时间由 main.py 通过 profiler.instrument 计入 GUESS_JANK 统计；
+两种后端都是异步开始混音，真正出声的延迟在这里测不到。
+"""
+import os
+from collections import deque
+
+from kivy.utils import platform
+
+VOICES = 3  # 同一音效最多同时播放的路数
+
+
+class SoundEffects:
+    def __init__(self, voices=VOICES):
+        self.voices = voices
+        self.sounds = {}
+        self.pool = None
+        if platform == 'android':
+            try:
+                from jnius import autoclass
+                SoundPool = autoclass('android.media.SoundPool')
+                AudioManager = autoclass('android.media.AudioManager')
+                self.pool = SoundPool(voices * 2, AudioManager.STREAM_MUSIC, 0)
+            except Exception as e:
+                print(f"警告: SoundPool 不可用 ({e})，改用 SoundLoader")
+
+    def load(self, name, path):
+        try:
+            if self.pool:
+                self.sounds[name] = self.pool.load(os.path.abspath(path), 1)
+            else:
+                from kivy.core.audio import SoundLoader
+                voices = [SoundLoader.load(path) for _ in range(self.voices)]
+                if all(voices):
+                    self.sounds[name] = deque(voices)
+        except Exception as e:
+            print(f"警告: 音效 {path} 加载失败 ({e})")
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is None:
+            return
+        if self.pool:
+            self.pool.play(sound, 1.0, 1.0, 1, 0, 1.0)
+        else:
+            # 优先用已经播完的声道，都在播时抢占最早开始的那个
+            for _ in range(len(sound)):
+                if sound[0].state == 'stop':
+                    break
+                sound.rotate(-1)
+            voice = sound.popleft()
+            if voice.state != 'stop':
+                voice.stop()
+            voice.play()
+            sound.append(voice)
+
+    def unload(self):
+        if self.pool:
+            self.pool.release()
+        else:
+            for voices in self.sounds.values():
+                for voice in voices:
+                    voice.unload()
+        self.sounds.clear()
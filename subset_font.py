@@ -0,0 +1,72 @@
+"""字体子集化 (打包前运行)
+
+扫描 words.json 里的类别名和词条、以及各 .py 文件里的字符串常量 (界面文字)，
+从完整的思源黑体里只保留用到的字形，生成 fonts/SourceHanSansSC-Subset.otf，
+并把收录的字符写到 fonts/SourceHanSansSC-Subset.txt，运行时遇到子集里没有的字再回退到完整字体。
+
+需要 fonttools: pip install fonttools
+用法: python subset_font.py
+"""
+import ast
+import glob
+import json
+import os
+import sys
+
+FULL_FONT = 'fonts/SourceHanSansSC-Regular.otf'
+SUBSET_FONT = 'fonts/SourceHanSansSC-Subset.otf'
+SUBSET_CHARS = 'fonts/SourceHanSansSC-Subset.txt'
+
+# 始终保留：ASCII 可见字符和常用全角标点
+BASE_CHARS = ''.join(chr(c) for c in range(0x20, 0x7f)) + '，。！？、：；“”‘’（）《》…—·～'
+
+
+def collect_chars(words_path='words.json', sources='*.py'):
+    chars = set(BASE_CHARS)
+    with open(words_path, 'r', encoding='utf-8') as f:
+        for cat, words in json.load(f).items():
+            chars.update(cat)
+            for word in words:
+                if isinstance(word, str):
+                    chars.update(word)
+    for path in glob.glob(sources):
+        with open(path, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                chars.update(node.value)
+    chars.discard('\n')
+    return ''.join(sorted(chars))
+
+
+def build_subset(text, src=FULL_FONT, dst=SUBSET_FONT, chars_path=SUBSET_CHARS):
+    from fontTools import subset
+
+    options = subset.Options()
+    options.layout_features = ['*']
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+    font = subset.load_font(src, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+    # 只记录字体里真正有字形的字符
+    covered = set(chr(c) for c in font.getBestCmap())
+    subset.save_font(font, dst, options)
+    with open(chars_path, 'w', encoding='utf-8') as f:
+        f.write(''.join(c for c in text if c in covered))
+
+
+if __name__ == '__main__':
+    try:
+        import fontTools  # noqa: F401
+    except ImportError:
+        print("需要先安装 fonttools: pip install fonttools")
+        sys.exit(1)
+    if not os.path.exists(FULL_FONT):
+        print(f"字体文件 {FULL_FONT} 不存在")
+        sys.exit(1)
+    text = collect_chars()
+    build_subset(text)
+    print(f"{FULL_FONT} ({os.path.getsize(FULL_FONT)} 字节) -> {SUBSET_FONT} "
+          f"({os.path.getsize(SUBSET_FONT)} 字节), {len(text)} 个字符")
@@ -0,0 +1,73 @@
+"""wordbank 流式导入：值被块边界截断时的解析，导入结果的缓存"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import Cache  # noqa: E402
+from wordbank import BankImporter, find_pack, import_bank  # noqa: E402
+
+
+class ChunkBoundaryTest(unittest.TestCase):
+    def import_text(self, text, chunk_size):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            return import_bank(path, chunk_size=chunk_size)
+        finally:
+            os.remove(path)
+
+    def assert_same_at_every_split(self, text):
+        expected = self.import_text(text, 1 << 16)
+        for chunk_size in range(1, len(text.encode('utf-8')) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.import_text(text, chunk_size), expected)
+        return expected
+
+    def test_scalars_split_at_boundary(self):
+        data, problems = self.assert_same_at_every_split('{"a":[true, null, 1.5e3, "ok"]}')
+        self.assertEqual(data, {'a': ['ok']})
+        self.assertEqual(len(problems), 3)  # 三个非字符串词条，没有格式错误
+
+    def test_number_before_closing_bracket(self):
+        data, problems = self.assert_same_at_every_split('{"a":["x",12.75],"b":-3e-2,"c":["y"]}')
+        self.assertEqual(data, {'a': ['x'], 'c': ['y']})
+        self.assertFalse(any('格式错误' in p or '应为' in p for p in problems))
+
+    def test_multibyte_words_split_at_boundary(self):
+        text = json.dumps({"动物": ["蜈蚣", "橄榄球"], "成语": ["一心一意"]}, ensure_ascii=False)
+        data, problems = self.assert_same_at_every_split(text)
+        self.assertEqual(data, {"动物": ["蜈蚣", "橄榄球"], "成语": ["一心一意"]})
+        self.assertEqual(problems, [])
+
+
+class ImporterCacheTest(unittest.TestCase):
+    def run_importer(self, text):
+        root = tempfile.mkdtemp()
+        path = os.path.join(root, 'words.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        cache = Cache(os.path.join(root, 'cache'))
+        results = []
+        BankImporter([path], lambda name, fraction: None, results.extend, cache, post=lambda f: f()).run()
+        return results, find_pack(path, os.path.join(root, 'words.pack'), cache)
+
+    def test_clean_file_is_cached(self):
+        results, pack = self.run_importer('{"a":["x","y"]}')
+        self.assertEqual(results[0][2], [])
+        self.assertIsNotNone(pack)
+
+    def test_file_with_problems_is_not_cached(self):
+        # 截断的文件：前面的词条能用，但下次启动要重新解析并再次提示
+        results, pack = self.run_importer('{"a":["x","y"],"b":["z"')
+        self.assertEqual(results[0][1]['a'], ['x', 'y'])
+        self.assertTrue(results[0][2])
+        self.assertIsNone(pack)
+
+
+if __name__ == '__main__':
+    unittest.main()
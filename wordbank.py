@@ -0,0 +1,423 @@
+"""题库加载与二进制题库包 (words.pack)
+
+words.pack 由本文件编译 words.json 得到，格式 (小端)：
+    文件头   : magic 'GGWB' | 版本 u16 | 保留 u16 | 类别数 u32
+    类别表   : 每个类别 5 个 u32 -> 名称偏移, 名称长度, 词条偏移, 词条长度, 词条数
+    字符串区 : UTF-8 编码，同一类别的词条以 '\\0' 连接
+
+运行时用 mmap 映射整个文件，只解析类别表；用户选中某个类别时才解码该类别的词条。
+没有可用的题库包时，由 BankImporter 在后台线程里增量解析 JSON，边解析边校验、去重。
+WordTable 把所有类别的词条合成一张去重的字符串表，类别只存下标数组，出题时传 WordView 而不复制字符串。
+
+用法: python wordbank.py [words.json] [words.pack]
+"""
+import codecs
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+
+PACK_MAGIC = b'GGWB'
+PACK_VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+ENTRY = struct.Struct('<IIIII')
+SEP = '\x00'
+
+DEFAULT_BANK = {"默认题库": ["苹果", "香蕉", "西瓜"]}
+MAX_WORD_LEN = 64
+MAX_PROBLEMS = 20  # 最多逐条列出的问题数，其余只计数
+
+
+# ==================== 编译 ====================
+def compile_pack(data, pack_path):
+    """把 {类别: [词条, ...]} 写成 words.pack (先写临时文件再原子替换)"""
+    names = []
+    blobs = []
+    for cat, words in data.items():
+        words = [w for w in words if isinstance(w, str) and w and SEP not in w]
+        names.append(cat.encode('utf-8'))
+        blobs.append((SEP.join(words).encode('utf-8'), len(words)))
+
+    offset = HEADER.size + ENTRY.size * len(names)
+    table = []
+    for name, (blob, count) in zip(names, blobs):
+        table.append((offset, len(name), offset + len(name), len(blob), count))
+        offset += len(name) + len(blob)
+
+    tmp_path = pack_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, len(names)))
+        for entry in table:
+            f.write(ENTRY.pack(*entry))
+        for name, (blob, count) in zip(names, blobs):
+            f.write(name)
+            f.write(blob)
+    os.replace(tmp_path, pack_path)
+
+
+# ==================== 读取 ====================
+class PackedWordBank:
+    """mmap 映射的题库包，按类别按需解码"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, n_cats = HEADER.unpack_from(self.mm, 0)
+            if magic != PACK_MAGIC or version != PACK_VERSION:
+                raise ValueError(f"{path} 不是有效的题库包")
+            self.index = {}
+            for i in range(n_cats):
+                name_off, name_len, off, length, count = ENTRY.unpack_from(self.mm, HEADER.size + i * ENTRY.size)
+                name = self.mm[name_off:name_off + name_len].decode('utf-8')
+                self.index[name] = (off, length, count)
+        except (struct.error, UnicodeDecodeError) as e:
+            self.mm.close()
+            raise ValueError(f"{path} 已损坏: {e}")
+        except ValueError:
+            self.mm.close()
+            raise
+        self.categories = list(self.index)
+
+    def count(self, category):
+        return self.index[category][2]
+
+    def get(self, category):
+        off, length, count = self.index[category]
+        if not count:
+            return []
+        return self.mm[off:off + length].decode('utf-8').split(SEP)
+
+    def close(self):
+        self.mm.close()
+
+
+class JsonWordBank:
+    """未编译题库包时的回退：整个 JSON 常驻内存，接口与 PackedWordBank 一致"""
+
+    def __init__(self, data):
+        self.data = data
+        self.categories = list(data)
+
+    def count(self, category):
+        return len(self.data[category])
+
+    def get(self, category):
+        return self.data[category]
+
+    def close(self):
+        pass
+
+
+class MergedWordBank:
+    """内置题库 + 自定义题库：同名类别的词条合并 (去重)，接口与 PackedWordBank 一致"""
+
+    def __init__(self, banks):
+        self.banks = banks
+        self.categories = list(dict.fromkeys(cat for bank in banks for cat in bank.categories))
+
+    def owners(self, category):
+        return [bank for bank in self.banks if category in bank.categories]
+
+    def count(self, category):
+        owners = self.owners(category)
+        return owners[0].count(category) if len(owners) == 1 else len(self.get(category))
+
+    def get(self, category):
+        owners = self.owners(category)
+        if len(owners) == 1:
+            return owners[0].get(category)
+        return list(dict.fromkeys(w for bank in owners for w in bank.get(category)))
+
+    def close(self):
+        for bank in self.banks:
+            bank.close()
+
+
+class WordView:
+    """词条表的只读序列视图 (按下标取词条)，GameScreen 拿它当题目列表用"""
+    __slots__ = ('words', 'ids')
+
+    def __init__(self, words, ids):
+        self.words = words
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        return self.words[self.ids[i]]
+
+    def __iter__(self):
+        words = self.words
+        return (words[i] for i in self.ids)
+
+
+class WordTable:
+    """所有词条只存一份：words 是去重后的字符串表，每个类别是一个 array('I') 下标数组
+
+    词条按类别顺序第一次出现的先后编号，所以"全部词条去重"就是 0..n-1，随机大挑战的题目池不用再拼接、去重；
+    出题记录按下标保存，同一题库每次建出的编号一致。建好后不再修改，题库变了就整个重建。
+    """
+
+    def __init__(self, bank):
+        ids = {}
+        self.words = []
+        self.categories = {}
+        for cat in bank.categories:
+            indices = array('I')
+            for word in bank.get(cat):
+                i = ids.get(word)
+                if i is None:
+                    i = ids[word] = len(self.words)
+                    self.words.append(word)
+                indices.append(i)
+            self.categories[cat] = indices
+        self.pool = WordView(self.words, range(len(self.words)))
+
+    def view(self, category):
+        return WordView(self.words, self.categories[category])
+
+
+def find_pack(json_path='words.json', pack_path='words.pack', cache=None):
+    """找一个可以直接 mmap 的题库包：随包发布的 (不比 JSON 旧)，或缓存里按 JSON 内容哈希编译好的"""
+    try:
+        if os.path.exists(pack_path) and (not os.path.exists(json_path)
+                                          or os.path.getmtime(pack_path) >= os.path.getmtime(json_path)):
+            return PackedWordBank(pack_path)
+    except (OSError, ValueError) as e:
+        print(f"警告: 题库包不可用 ({e})，改用 JSON")
+    if cache and os.path.exists(json_path):
+        try:
+            from cache import file_digest
+            cached = cache.get(f"bank-{file_digest(json_path)}.pack")
+            if cached:
+                return PackedWordBank(cached)
+        except (OSError, ValueError):
+            pass
+    return None
+
+
+# ==================== 流式导入 ====================
+_NOT_LIST = object()
+_EMPTY = object()
+_DELIMITERS = ',]} \t\r\n'
+MAX_TOKEN = 1 << 20  # 单个值超过这个长度仍解析不出来就判定为格式错误，不再继续读
+
+
+class BankParseError(ValueError):
+    pass
+
+
+class _StreamParser:
+    """按块读取、增量解析 {类别: [值, ...]} 形式的 JSON，不把整个文件读进内存"""
+
+    def __init__(self, f, chunk_size, on_read):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.on_read = on_read
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.base = 0  # buf[0] 在整个文件中的字符位置
+        self.eof = False
+
+    def where(self):
+        return self.base + self.pos
+
+    def fill(self):
+        data = self.f.read(self.chunk_size)
+        self.on_read(len(data))
+        if not data:
+            self.eof = True
+        self.base += self.pos
+        self.buf = self.buf[self.pos:] + self.decoder.decode(data, final=not data)
+        self.pos = 0
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self.fill()
+
+    def expect(self, ch):
+        if self.peek() != ch:
+            raise BankParseError(f"第 {self.where()} 个字符处应为 '{ch}'")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buf, self.pos)
+                # 数字、true 等可能被块边界截断 ("1." 会解析成 1)，后面紧跟分隔符或到了文件末尾才算完整
+                if self.eof or isinstance(value, (str, list, dict)) or (
+                        end < len(self.buf) and self.buf[end] in _DELIMITERS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof or len(self.buf) - self.pos > MAX_TOKEN:
+                    raise BankParseError(f"第 {self.base + e.pos} 个字符处 JSON 格式错误: {e.msg}")
+            self.fill()
+
+    def items(self):
+        """逐个产出 (类别, 值, 位置)；类别内容不是数组时值为 _NOT_LIST"""
+        self.expect('{')
+        if self.peek() == '}':
+            return
+        while True:
+            where = self.where()
+            name = self.value()
+            if not isinstance(name, str):
+                raise BankParseError(f"第 {where} 个字符处类别名应为字符串")
+            self.expect(':')
+            if self.peek() != '[':
+                where = self.where()
+                self.value()
+                yield name, _NOT_LIST, where
+            else:
+                self.pos += 1
+                if self.peek() == ']':
+                    self.pos += 1
+                    yield name, _EMPTY, where
+                else:
+                    while True:
+                        where = self.where()
+                        yield name, self.value(), where
+                        if self.peek() == ']':
+                            self.pos += 1
+                            break
+                        self.expect(',')
+            if self.peek() == '}':
+                return
+            self.expect(',')
+
+
+def import_bank(path, on_progress=None, chunk_size=1 << 16):
+    """流式解析并校验题库文件，返回 ({类别: [词条, ...]}, 问题列表)
+
+    无效词条 (非字符串、空、过长、含控制字符) 跳过并记录，重复词条去掉并计数；
+    遇到 JSON 格式错误时停止，保留之前解析出的内容。
+    """
+    data = {}
+    seen = {}
+    problems = []
+    skipped = 0
+    duplicates = 0
+    total = os.path.getsize(path) or 1
+    done = [0]
+
+    def on_read(n):
+        done[0] += n
+        if on_progress:
+            on_progress(min(1.0, done[0] / total))
+
+    def problem(msg):
+        nonlocal skipped
+        skipped += 1
+        if skipped <= MAX_PROBLEMS:
+            problems.append(msg)
+
+    with open(path, 'rb') as f:
+        parser = _StreamParser(f, chunk_size, on_read)
+        try:
+            for cat, value, where in parser.items():
+                words = data.setdefault(cat, [])
+                if value is _EMPTY:
+                    continue
+                if value is _NOT_LIST:
+                    problem(f"类别 {cat} 的内容不是数组 (第 {where} 个字符)")
+                    continue
+                if not isinstance(value, str):
+                    problem(f"{cat}: 第 {where} 个字符处的词条不是字符串: {str(value)[:20]}")
+                    continue
+                word = value.strip()
+                if not word:
+                    problem(f"{cat}: 第 {where} 个字符处是空词条")
+                elif len(word) > MAX_WORD_LEN:
+                    problem(f"{cat}: 词条过长 ({word[:10]}…)")
+                elif any(ord(c) < 0x20 for c in word):
+                    problem(f"{cat}: 词条含控制字符 ({word[:10]!r})")
+                else:
+                    cat_seen = seen.setdefault(cat, set())
+                    if word in cat_seen:
+                        duplicates += 1
+                    else:
+                        cat_seen.add(word)
+                        words.append(word)
+        except BankParseError as e:
+            problems.append(f"{e}，之后的内容未导入")
+
+    if skipped > MAX_PROBLEMS:
+        problems.append(f"另有 {skipped - MAX_PROBLEMS} 条无效词条已跳过")
+    if duplicates:
+        problems.append(f"已去掉 {duplicates} 条重复词条")
+    return {cat: words for cat, words in data.items() if words}, problems
+
+
+class BankImporter:
+    """在后台线程里依次导入若干题库文件，进度和结果通过 post (默认 Kivy Clock) 送回主线程
+
+    on_progress(文件名, 进度 0~1)；on_done([(文件名, 数据, 问题列表), ...])。
+    cache 不为空时，解析成功且没有问题的文件顺便按内容哈希编译成题库包放进缓存，下次直接 mmap。
+    """
+
+    def __init__(self, paths, on_progress, on_done, cache=None, post=None):
+        self.paths = paths
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.cache = cache
+        if post is None:
+            from kivy.clock import Clock
+            post = lambda fn: Clock.schedule_once(lambda dt: fn())
+        self.post = post
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        results = []
+        for path in self.paths:
+            name = os.path.basename(path)
+            last = [0.0]
+
+            def progress(fraction, name=name):
+                # 限制回调频率，避免刷屏主线程
+                now = time.monotonic()
+                if fraction >= 1 or now - last[0] > 0.1:
+                    last[0] = now
+                    self.post(lambda: self.on_progress(name, fraction))
+            try:
+                data, problems = import_bank(path, progress)
+            except OSError as e:
+                data, problems = {}, [f"{name} 读取失败: {e}"]
+            # 有问题的文件不缓存：下次启动重新解析，问题才会再提示出来，否则 find_pack 会悄悄 mmap 截断的题库
+            if data and not problems and self.cache:
+                try:
+                    from cache import file_digest
+                    self.cache.put(f"bank-{file_digest(path)}.pack", lambda p: compile_pack(data, p))
+                except OSError:
+                    pass
+            results.append((name, data, problems))
+        self.post(lambda: self.on_done(results))
+
+
+if __name__ == '__main__':
+    src = sys.argv[1] if len(sys.argv) > 1 else 'words.json'
+    dst = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(src)[0] + '.pack'
+    # 和运行时导入走同一套校验、去重，否则两条路径下的类别长度不同，按长度保存的出题记录会被重置
+    bank, problems = import_bank(src)
+    for p in problems:
+        print(f"警告: {p}")
+    if not bank:
+        sys.exit(f"{src} 里没有可用的词条")
+    compile_pack(bank, dst)
+    print(f"{src} -> {dst}: {len(bank)} 个类别, {sum(len(v) for v in bank.values())} 个词条, "
+          f"{os.path.getsize(dst)} 字节")